@@ -0,0 +1,113 @@
+import math
+import logging
+import threading
+from contextlib import contextmanager
+
+from lib.constant import ADMISSION_PARAMETER
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    """Raised when a request is rejected because the server is saturated."""
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Reject work up front when the inference path is saturated.
+
+    The real-time factor (inference seconds per audio second) of every model is
+    measured as a moving average. A request is admitted only while the number of
+    waiting / running jobs stays under `max_queue_depth` and the estimated wait
+    (audio ahead of it times the current RTF) stays under `max_wait_s`.
+    """
+    def __init__(self, max_queue_depth=ADMISSION_PARAMETER["max_queue_depth"], max_wait_s=ADMISSION_PARAMETER["max_wait_s"],
+                 initial_rtf=ADMISSION_PARAMETER["initial_rtf"], smoothing=ADMISSION_PARAMETER["rtf_smoothing"]):
+        self.max_queue_depth = max_queue_depth
+        self.max_wait_s = max_wait_s
+        self.initial_rtf = initial_rtf
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._rtf = {}
+        self.in_flight = 0
+        self.in_flight_seconds = 0.0
+        self.rejected = 0
+
+    def record(self, model_version, audio_seconds, elapsed):
+        """Fold a finished transcription into the RTF average of `model_version`."""
+        if not model_version or audio_seconds <= 0:
+            return
+        rtf = elapsed / audio_seconds
+        with self._lock:
+            previous = self._rtf.get(model_version)
+            self._rtf[model_version] = rtf if previous is None else previous + self.smoothing * (rtf - previous)
+
+    def rtf(self, model_version):
+        """The measured RTF of `model_version` (`initial_rtf` until it has served a request)."""
+        with self._lock:
+            return self._rtf.get(model_version, self.initial_rtf)
+
+    def estimate_wait(self, model_version, queued_seconds=0.0):
+        """
+        :param queued_seconds: float
+            Audio waiting in job queues in front of the request.
+        :rtype: float
+            Estimated seconds until a new request would start.
+        """
+        return (self.in_flight_seconds + queued_seconds) * self.rtf(model_version)
+
+    def check(self, model_version, queued=0, queued_seconds=0.0):
+        """
+        Admit or reject a new request.
+
+        :param queued: int
+            Jobs waiting in job queues.
+        :param queued_seconds: float
+            Audio seconds of those jobs.
+        :raises Overloaded: If the queue is full or the estimated wait is too long.
+        """
+        depth = self.in_flight + queued
+        wait = self.estimate_wait(model_version, queued_seconds)
+        if depth >= self.max_queue_depth:
+            reason = f"queue depth {depth} reached the limit {self.max_queue_depth}"
+        elif wait > self.max_wait_s:
+            reason = f"estimated wait {wait:.1f}s exceeds {self.max_wait_s}s"
+        else:
+            return
+        with self._lock:
+            self.rejected += 1
+        logger.info(f" | request rejected: {reason} | ")
+        raise Overloaded(reason, retry_after=max(1, math.ceil(wait)))
+
+    @contextmanager
+    def track(self, audio_seconds):
+        """Count a job as in flight while the block runs."""
+        with self._lock:
+            self.in_flight += 1
+            self.in_flight_seconds += audio_seconds
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.in_flight_seconds -= audio_seconds
+
+    def status(self, model_version, queued=0, queued_seconds=0.0):
+        """Queue depth, wait estimate and RTFs, for load balancers."""
+        with self._lock:
+            rtf = dict(self._rtf)
+        return {
+            "queue_depth": self.in_flight + queued,
+            "in_flight": self.in_flight,
+            "queued": queued,
+            "queued_audio_seconds": queued_seconds,
+            "estimated_wait": self.estimate_wait(model_version, queued_seconds),
+            "max_queue_depth": self.max_queue_depth,
+            "max_wait_s": self.max_wait_s,
+            "rtf": rtf,
+            "rejected": self.rejected,
+        }
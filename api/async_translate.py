@@ -0,0 +1,111 @@
+import os
+import sys
+import yaml
+import httpx
+import asyncio
+import logging
+from ollama import AsyncClient
+from openai import AsyncAzureOpenAI
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from lib.constant import AZURE_CONFIG, LANGUAGE_LIST, USER_PRMOPT_TITLE, ASYNC_HTTP
+from api.prompt_registry import PROMPT_REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+def _limits():
+    return httpx.Limits(max_connections=ASYNC_HTTP["max_connections"], max_keepalive_connections=ASYNC_HTTP["max_keepalive_connections"])
+
+
+class AsyncGpt4oTranslate:
+    """
+    Async variant of `Gpt4oTranslate` on a pooled HTTP/2 connection.
+
+    Concurrent translations (e.g. several target languages of one sentence)
+    share the connection instead of blocking an inference thread each.
+    """
+    def __init__(self):
+        with open(AZURE_CONFIG, 'r') as file:
+            self.config = yaml.safe_load(file)
+
+        self.http_client = httpx.AsyncClient(http2=True, limits=_limits(), timeout=ASYNC_HTTP["timeout"])
+        self.client = AsyncAzureOpenAI(api_key=self.config['API_KEY'],
+                                       api_version=self.config['AZURE_API_VERSION'],
+                                       azure_endpoint=self.config['AZURE_ENDPOINT'],
+                                       azure_deployment=self.config['AZURE_DEPLOYMENT'],
+                                       http_client=self.http_client,
+                                       )
+
+    async def translate(self, source_text, source_lang, target_lang):
+        system_prompt = PROMPT_REGISTRY.get(source_lang, target_lang)
+        response = await self.client.chat.completions.create(
+            model=self.config['AZURE_DEPLOYMENT'],
+            messages=[
+                { "role": "system", "content": system_prompt},
+                { "role": "user", "content": source_text},
+            ],
+            max_tokens=4000,
+            temperature=0,
+        )
+        return response.choices[0].message.content
+
+    async def close(self):
+        await self.http_client.aclose()
+
+
+class AsyncOllamaChat:
+    """
+    Async variant of `OllamaChat` on a pooled keep-alive connection.
+
+    The model is already kept loaded by the synchronous client, so no warm-up
+    request is sent here.
+    """
+    def __init__(self, config_path):
+        self.config_path = config_path
+        with open(config_path, "r", encoding="utf-8") as f:
+            self.config = yaml.safe_load(f)
+        self.client = AsyncClient(host=self.config["HOST"], limits=_limits(), timeout=ASYNC_HTTP["timeout"])
+
+    async def chat(self, source_text="", source_lang="zh", target_lang="en", temperature=0.0):
+        if not {source_lang, target_lang}.issubset(LANGUAGE_LIST):
+            logger.error(f" | Error: source_lang \"{source_lang}\" or target_lang \"{target_lang}\" not in LANGUAGE_LIST \"{LANGUAGE_LIST}\" | ")
+            return source_text
+        messages = [
+            {"role": "system", "content": PROMPT_REGISTRY.get(source_lang, target_lang)},
+            {"role": "user", "content": source_text},
+        ]
+        try:
+            response = await self.client.chat(
+                model=self.config["MODEL"],
+                messages=messages,
+                options={"temperature": temperature},
+                stream=False,
+                keep_alive=-1
+            )
+        except Exception as e:
+            logger.error(f" | async ollama Error: {e} | ")
+            return source_text
+        text = response.message.content
+        prompt_title = USER_PRMOPT_TITLE.get(target_lang)
+        if prompt_title and text.startswith(prompt_title):
+            text = text[len(prompt_title):]
+        return text
+
+    async def close(self):
+        # ollama's AsyncClient keeps its pooled httpx client in `_client`
+        await self.client._client.aclose()
+
+
+async def close_after(client, delay):
+    """
+    Close a replaced async client once the requests still using it had time to finish.
+
+    :param delay: float
+        Seconds to wait first, the request timeout of the client.
+    """
+    await asyncio.sleep(delay)
+    try:
+        await client.close()
+    except Exception as e:
+        logger.error(f" | async client close error: {e} | ")
@@ -0,0 +1,139 @@
+import io
+import wave
+import logging
+import subprocess
+import numpy as np
+
+from lib.constant import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+# Leading bytes of containers that need ffmpeg to be decoded
+CONTAINER_MAGIC = (
+    b"OggS",              # ogg / opus
+    b"fLaC",              # flac
+    b"ID3",               # mp3 with id3 tag
+    b"\xff\xfb",          # mp3 frame
+    b"\xff\xf3",          # mp3 frame
+    b"\xff\xf2",          # mp3 frame
+    b"\x1a\x45\xdf\xa3",  # webm / matroska
+)
+
+
+def pcm16_to_float32(pcm_bytes):
+    """
+    Convert little-endian 16-bit PCM bytes into a float32 waveform in [-1, 1].
+
+    :param pcm_bytes: bytes
+        The raw PCM data.
+    :rtype: np.ndarray
+        The float32 waveform.
+    """
+    if len(pcm_bytes) % 2:
+        pcm_bytes = pcm_bytes[:-1]
+    return np.frombuffer(pcm_bytes, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def resample(audio, orig_sr, target_sr=SAMPLE_RATE):
+    """
+    Resample a mono waveform with linear interpolation.
+
+    :param audio: np.ndarray
+        The float32 waveform.
+    :param orig_sr: int
+        The sample rate of the input waveform.
+    :param target_sr: int
+        The sample rate of the output waveform.
+    :rtype: np.ndarray
+        The resampled float32 waveform.
+    """
+    if orig_sr == target_sr or audio.size == 0:
+        return audio.astype(np.float32, copy=False)
+    target_length = int(round(audio.shape[0] * target_sr / orig_sr))
+    src_index = np.linspace(0, audio.shape[0] - 1, num=target_length, dtype=np.float64)
+    return np.interp(src_index, np.arange(audio.shape[0]), audio).astype(np.float32)
+
+
+def _decode_wav(audio_bytes):
+    """Decode an integer PCM WAV container in-process."""
+    with wave.open(io.BytesIO(audio_bytes), "rb") as wav:
+        channels = wav.getnchannels()
+        sample_width = wav.getsampwidth()
+        sample_rate = wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+
+    if sample_width == 1:
+        audio = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        audio = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+    elif sample_width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        audio = (raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8) | (raw[:, 2].astype(np.int8).astype(np.int32) << 16))
+        audio = audio.astype(np.float32) / 8388608.0
+    elif sample_width == 4:
+        audio = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"unsupported WAV sample width: {sample_width}")
+
+    if channels > 1:
+        audio = audio[: len(audio) - len(audio) % channels].reshape(-1, channels).mean(axis=1)
+    return resample(audio, sample_rate)
+
+
+def _decode_with_ffmpeg(audio_bytes):
+    """Decode any container ffmpeg understands by piping it through stdin."""
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0",
+        "-i", "pipe:0",
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE),
+        "-",
+    ]
+    try:
+        out = subprocess.run(cmd, input=audio_bytes, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='ignore')}") from e
+    return pcm16_to_float32(out)
+
+
+def decode_audio_bytes(audio_bytes, sample_rate=None):
+    """
+    Decode uploaded audio bytes into a float32 mono waveform at 16 kHz.
+
+    WAV (integer PCM) is decoded in-process. When the caller gives `sample_rate`,
+    bytes without a known container header are raw 16-bit little-endian mono PCM
+    at that rate. Everything else is piped through ffmpeg without touching the disk,
+    so unknown or broken input fails instead of being read as noise.
+
+    :param audio_bytes: bytes
+        The uploaded audio content.
+    :param sample_rate: int
+        The sample rate of raw PCM input, None when the input is always a container.
+    :rtype: np.ndarray
+        The float32 waveform sampled at 16 kHz.
+    :raises RuntimeError: If ffmpeg cannot decode the input.
+    """
+    if audio_bytes[:4] == b"RIFF" and audio_bytes[8:12] == b"WAVE":
+        try:
+            return _decode_wav(audio_bytes)
+        except (wave.Error, ValueError) as e:
+            # e.g. IEEE float or compressed WAV, let ffmpeg handle it
+            logger.debug(f" | in-process WAV decode failed ({e}), fallback to ffmpeg | ")
+            return _decode_with_ffmpeg(audio_bytes)
+    if sample_rate is not None and not (audio_bytes.startswith(CONTAINER_MAGIC) or audio_bytes[4:8] == b"ftyp"):
+        return resample(pcm16_to_float32(audio_bytes), sample_rate)
+    return _decode_with_ffmpeg(audio_bytes)
+
+
+def load_audio_file(audio_file_path, sample_rate=None):
+    """
+    Read an audio file from disk and decode it with `decode_audio_bytes`.
+
+    :param audio_file_path: str
+        The path to the audio file.
+    :param sample_rate: int
+        The sample rate of raw PCM input, if known.
+    :rtype: np.ndarray
+        The float32 waveform sampled at 16 kHz.
+    """
+    with open(audio_file_path, "rb") as f:
+        return decode_audio_bytes(f.read(), sample_rate)
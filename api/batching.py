@@ -0,0 +1,103 @@
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class BatchScheduler:
+    """
+    Collect requests that arrive within a short window and run them as one batch.
+
+    Callers `submit` a payload and block on the returned future. A dedicated thread
+    waits for the first request, keeps collecting until the window closes or the
+    batch is full, groups the batch by key and calls `batch_fn(key, payloads)` once
+    per group. `batch_fn` returns one result per payload, in order; a result that is
+    an exception instance is raised to that caller only.
+    """
+    def __init__(self, batch_fn, window_ms, max_batch_size, name="batch"):
+        """
+        :param batch_fn: callable
+            `batch_fn(key, payloads) -> list` running one group as a single pass.
+        :param window_ms: float
+            How long to keep collecting after the first request arrives.
+        :param max_batch_size: int
+            The largest number of requests run together.
+        :param name: str
+            The name of the scheduler thread.
+        """
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, payload, key=None):
+        """
+        Queue a payload for the next batch.
+
+        :param payload: Any
+            The request payload handed to `batch_fn`.
+        :param key: Hashable
+            Requests are only batched with requests of the same key.
+        :rtype: concurrent.futures.Future
+            A future resolving to this payload's result.
+        """
+        future = Future()
+        self._queue.put((future, payload, key))
+        return future
+
+    def close(self):
+        """Stop the scheduler thread once the queued batches are done."""
+        self._queue.put(None)
+
+    def _collect(self):
+        """Block for the first request, then gather more until the window closes."""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        window_end = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = window_end - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Finish this batch first, then stop
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+
+            groups = {}
+            for future, payload, key in batch:
+                if future.set_running_or_notify_cancel():
+                    groups.setdefault(key, []).append((future, payload))
+
+            for key, entries in groups.items():
+                try:
+                    results = self.batch_fn(key, [payload for _, payload in entries])
+                except Exception as e:
+                    logger.error(f" | batch of {len(entries)} failed: {e} | ")
+                    for future, _ in entries:
+                        future.set_exception(e)
+                    continue
+                for (future, _), result in zip(entries, results):
+                    if isinstance(result, BaseException):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+                logger.debug(f" | ran a batch of {len(entries)} requests (key: {key}) | ")
@@ -0,0 +1,83 @@
+import os
+import logging
+from faster_whisper import WhisperModel
+
+logger = logging.getLogger(__name__)
+
+
+class CT2Whisper:
+    """
+    CTranslate2 (faster-whisper) Whisper engine with the `whisper.Whisper.transcribe` interface.
+
+    Takes the same keyword options as `whisper.transcribe` (see `DecodeOptions.whisper_options`)
+    and returns a dict with "text", "segments" and "language", so `Model` handles it
+    like the PyTorch models. int8 weights make `medium` usable on CPU-only nodes.
+    """
+    def __init__(self, model_path, device="cpu", compute_type="int8", intra_threads=0, inter_threads=1):
+        """
+        :param model_path: str
+            Directory of a converted CTranslate2 Whisper model (`ct2-transformers-converter`).
+        :param compute_type: str
+            "int8", "float16" or "float32".
+        :param intra_threads: int
+            Threads used by one transcription on CPU, 0 for the CTranslate2 default.
+        :param inter_threads: int
+            Transcriptions CTranslate2 runs in parallel.
+        """
+        self.settings = {"device": device, "compute_type": compute_type, "intra_threads": intra_threads, "inter_threads": inter_threads}
+        self.inter_threads = inter_threads
+        self.model = WhisperModel(model_path, device=device, compute_type=compute_type,
+                                  cpu_threads=intra_threads, num_workers=inter_threads)
+        weights = os.path.join(model_path, "model.bin")
+        # Reported to the model pool, CTranslate2 weights are not torch tensors
+        self.size_mb = os.path.getsize(weights) / (1024 ** 2) if os.path.exists(weights) else 0.0
+        logger.info(f" | CTranslate2 Whisper '{model_path}' on {device} ({compute_type}, intra {intra_threads}, inter {inter_threads}). | ")
+
+    def transcribe(self, audio, deadline=None, max_fallbacks=None, min_fallback_remaining=0.0, fp16=None, language=None, task="transcribe",
+                   logprob_threshold=-1.0, no_speech_threshold=0.6, temperature=(0.0, 0.2, 0.4, 0.6, 0.8, 1.0), beam_size=None,
+                   initial_prompt=None):
+        """
+        :param audio: np.ndarray
+            The float32 16 kHz waveform.
+        :param deadline: Deadline
+            Optional deadline, checked after every decoded segment.
+        :param max_fallbacks: int
+            Caps the temperature schedule at `max_fallbacks` re-decodes per window.
+        :param min_fallback_remaining: float
+            No fallback temperatures at all when fewer seconds than this are left before the deadline.
+        :param fp16: bool
+            Ignored, the precision is the `compute_type` the engine was loaded with.
+        :rtype: dict
+            Also has "fallbacks", the re-decodes at a higher temperature.
+        """
+        temperature = tuple(temperature) if isinstance(temperature, (list, tuple)) else (temperature,)
+        if max_fallbacks is not None:
+            temperature = temperature[:max_fallbacks + 1]
+        if deadline is not None and deadline.remaining() < min_fallback_remaining:
+            # CTranslate2 fixes the schedule for the whole call, so it is decided up front
+            temperature = temperature[:1]
+        segments, info = self.model.transcribe(
+            audio,
+            language=language,
+            task=task,
+            beam_size=beam_size or 1,  # greedy, like whisper.transcribe without beam_size
+            temperature=temperature,
+            log_prob_threshold=logprob_threshold,
+            no_speech_threshold=no_speech_threshold,
+            initial_prompt=initial_prompt,
+        )
+        # Segments are decoded lazily, so the deadline is checked before every window
+        texts = []
+        window_temperatures = {}
+        segments = iter(segments)
+        while True:
+            if deadline is not None:
+                deadline.check("decode", "".join(texts))
+            segment = next(segments, None)
+            if segment is None:
+                break
+            texts.append(segment.text)
+            window_temperatures[segment.seek] = segment.temperature
+        # The segments of one window share its temperature, whose position in the schedule is its re-decode count
+        fallbacks = sum(temperature.index(t) if t in temperature else 0 for t in window_temperatures.values())
+        return {"text": "".join(texts), "segments": texts, "language": info.language, "fallbacks": fallbacks}
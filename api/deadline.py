@@ -0,0 +1,111 @@
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceTimeout(Exception):
+    """
+    Raised when a transcription / translation job runs past its deadline.
+
+    :param stage: str
+        The pipeline stage that noticed the deadline (e.g. "transcribe", "translate").
+    :param partial: str
+        The text produced before the deadline was hit.
+    """
+    def __init__(self, stage, partial=""):
+        super().__init__(f"deadline exceeded before {stage}")
+        self.stage = stage
+        self.partial = partial
+
+
+class Deadline:
+    """A point in time by which an inference job has to be finished."""
+    def __init__(self, seconds=None):
+        """
+        :param seconds: float
+            Time budget from now, `None` means no deadline.
+        """
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self):
+        """Seconds left before the deadline (`inf` when there is none)."""
+        if self.expires_at is None:
+            return float("inf")
+        return self.expires_at - time.monotonic()
+
+    def expired(self):
+        """Whether the deadline has passed."""
+        return self.remaining() <= 0
+
+    def check(self, stage, partial=""):
+        """
+        Raise `InferenceTimeout` if the deadline has passed.
+
+        :param stage: str
+            The stage about to run.
+        :param partial: str
+            The text produced so far, handed back to the caller.
+        """
+        if self.expired():
+            logger.debug(f" | deadline exceeded before {stage} | ")
+            raise InferenceTimeout(stage, partial)
+
+
+class DeadlineWhisper:
+    """
+    Per-request view of a Whisper model that checks a deadline between decode windows.
+
+    `whisper.transcribe` calls `model.decode` once per 30 s window (and once per
+    temperature fallback), so checking there stops long clips cleanly without
+    touching the shared model. Temperature fallbacks beyond `max_fallbacks` per
+    window, or with less than `min_remaining` seconds left, are skipped by handing
+    back the previous decode of the window. Everything else is delegated to the real model.
+    """
+    def __init__(self, model, deadline, max_fallbacks=None, min_remaining=0.0):
+        """
+        :param max_fallbacks: int
+            Re-decodes allowed per window, `None` for whisper's full temperature schedule.
+        :param min_remaining: float
+            Skip fallbacks when fewer seconds than this are left before the deadline.
+        """
+        self._model = model
+        self._deadline = deadline
+        self.max_fallbacks = max_fallbacks
+        self.min_remaining = min_remaining
+        self._segment = None
+        self._result = None
+        self._window_fallbacks = 0
+        self._texts = []
+        self.fallbacks = 0
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+    def __call__(self, *args, **kwargs):
+        return self._model(*args, **kwargs)
+
+    @property
+    def partial_text(self):
+        """The text decoded from the windows finished so far."""
+        return "".join(self._texts).strip()
+
+    def decode(self, mel, options):
+        self._deadline.check("decode", self.partial_text)
+        if mel is self._segment and self._result is not None:
+            # A temperature fallback of the same window
+            capped = self.max_fallbacks is not None and self._window_fallbacks >= self.max_fallbacks
+            if capped or self._deadline.remaining() < self.min_remaining:
+                return self._result
+            self._window_fallbacks += 1
+            self.fallbacks += 1
+            result = self._model.decode(mel, options)
+            # Keep only the latest text of the window
+            self._texts[-1] = result.text
+        else:
+            self._window_fallbacks = 0
+            result = self._model.decode(mel, options)
+            self._texts.append(result.text)
+        self._segment = mel
+        self._result = result
+        return result
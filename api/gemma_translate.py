@@ -8,7 +8,8 @@ import torch
 from transformers import AutoProcessor, Gemma3ForConditionalGeneration  
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from lib.constant import LANGUAGE_LIST, SOURCE_LANGUAGE, SYSTEM_PRMOPT, USER_PRMOPT_TITLE, SAMPLE_1, SAMPLE_2, SAMPLE_3, ModlePath
+from lib.constant import LANGUAGE_LIST, USER_PRMOPT_TITLE, ModlePath
+from api.prompt_registry import PROMPT_REGISTRY
 
 logger = logging.getLogger(__name__)
 
@@ -29,15 +30,8 @@ class Gemma4BTranslate:
         
     def translate(self, source_text, source_lang, target_lang):
         if {source_lang, target_lang}.issubset(LANGUAGE_LIST):  
-            system_prompt = SYSTEM_PRMOPT[target_lang]
-            try:
-                system_prompt = system_prompt.replace("source_language", SOURCE_LANGUAGE[LANGUAGE_LIST.index(source_lang)][LANGUAGE_LIST.index(target_lang)])  
-                system_prompt = system_prompt.replace("sample_1", SAMPLE_1[source_lang])  
-                system_prompt = system_prompt.replace("sample_2", SAMPLE_2[source_lang])  
-                system_prompt = system_prompt.replace("sample_3", SAMPLE_3[source_lang])  
-            except Exception as e:
-                logger.error(f"Error: {e}")
-            logger.debug(f" | system prompt: {system_prompt} | ")
+            system_prompt = PROMPT_REGISTRY.get(source_lang, target_lang)
+            logger.debug(f" | system prompt {PROMPT_REGISTRY.prompt_hash(source_lang, target_lang)}: {system_prompt} | ")
         
             messages=[
                 { 
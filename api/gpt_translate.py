@@ -11,7 +11,8 @@ import yaml
 import logging  
 from openai import AzureOpenAI
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from lib.constant import AZURE_CONFIG, LANGUAGE_LIST, SOURCE_LANGUAGE, SYSTEM_PRMOPT, USER_PRMOPT_TITLE, SAMPLE_1, SAMPLE_2, SAMPLE_3
+from lib.constant import AZURE_CONFIG, LANGUAGE_LIST
+from api.prompt_registry import PROMPT_REGISTRY, build_batch_prompt, parse_batch_reply
 
 logger = logging.getLogger(__name__)
 
@@ -28,15 +29,8 @@ class Gpt4oTranslate:
         
     def translate(self, source_text, source_lang, target_lang):
         if {source_lang, target_lang}.issubset(LANGUAGE_LIST):  
-            system_prompt = SYSTEM_PRMOPT[target_lang]
-            try:
-                system_prompt = system_prompt.replace("source_language", SOURCE_LANGUAGE[LANGUAGE_LIST.index(source_lang)][LANGUAGE_LIST.index(target_lang)])  
-                system_prompt = system_prompt.replace("sample_1", SAMPLE_1[source_lang])  
-                system_prompt = system_prompt.replace("sample_2", SAMPLE_2[source_lang])  
-                system_prompt = system_prompt.replace("sample_3", SAMPLE_3[source_lang])  
-            except Exception as e:
-                logger.error(f"Error: {e}")
-            logger.debug(f"system prompt: {system_prompt}")
+            system_prompt = PROMPT_REGISTRY.get(source_lang, target_lang)
+            logger.debug(f" | system prompt {PROMPT_REGISTRY.prompt_hash(source_lang, target_lang)}: {system_prompt} | ")
         
         # 調用 OpenAI 模型  
         response = self.client.chat.completions.create(
@@ -54,4 +48,23 @@ class Gpt4oTranslate:
             temperature=0,  
         )  
         
-        return response.choices[0].message.content
\ No newline at end of file
+        return response.choices[0].message.content
+
+    def translate_batch(self, source_texts, source_lang, target_lang):
+        """
+        Translate several segments of one language pair in a single call (numbered-list prompt).
+
+        :rtype: list | None
+            One translation per segment, or None if the reply could not be split (the caller retries per segment).
+        """
+        system_prompt = PROMPT_REGISTRY.get(source_lang, target_lang)
+        response = self.client.chat.completions.create(
+            model=self.config['AZURE_DEPLOYMENT'], 
+            messages=[
+                { "role": "system", "content": system_prompt},
+                { "role": "user", "content": build_batch_prompt(source_texts)},
+            ],
+            max_tokens=4000,
+            temperature=0,  
+        )  
+        return parse_batch_reply(response.choices[0].message.content, len(source_texts))
\ No newline at end of file
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+from collections import OrderedDict
+
+from lib.constant import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """
+    asyncio-native waiting list of transcription jobs with fair scheduling.
+
+    Every (meeting_id, device_id) has its own FIFO queue and `get` serves the
+    queues round-robin, so one chatty device cannot starve the others. `put` wakes
+    a consumer blocked in `get`, so jobs are dispatched as soon as they arrive and
+    an idle queue costs nothing. A newer clip of an `audio_uid` that is still
+    waiting replaces the older one. Each device queue is an ordered dict keyed by
+    `audio_uid`, so enqueue, replace and dequeue are all O(1) however long the
+    backlog is. Must be used from the event loop thread.
+    """
+    def __init__(self):
+        # (meeting_id, device_id) -> {audio_uid: job} in FIFO order, the devices in round-robin order
+        self._queues = OrderedDict()
+        self._size = 0
+        self._seconds = 0.0
+        self._event = asyncio.Event()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def queued_seconds(self):
+        """The audio seconds of every waiting job."""
+        return self._seconds
+
+    def depths(self):
+        """
+        :rtype: dict
+            The number of waiting jobs of every "meeting_id/device_id".
+        """
+        return {f"{meeting_id}/{device_id}": len(jobs) for (meeting_id, device_id), jobs in self._queues.items()}
+
+    def put(self, response_data, audio, deliver):
+        """
+        Queue a clip, or replace the waiting clip of the same `audio_uid` if this one is newer.
+
+        :param response_data: ResponseSTT
+            The response skeleton of the clip (carries the ids and `times`).
+        :param audio: np.ndarray
+            The decoded waveform.
+        :param deliver: callable
+            `deliver(base_response)` hands the result to the session's result channel without blocking.
+        :rtype: bool
+            Whether the clip was queued (False if a newer clip of the same uid is waiting).
+        """
+        jobs = self._queues.setdefault((response_data.meeting_id, response_data.device_id), OrderedDict())
+        waiting = jobs.get(response_data.audio_uid)
+        if waiting is not None and waiting[0].times >= response_data.times:
+            return False
+        # The newer clip replaces the waiting one and goes to the back of the queue
+        jobs[response_data.audio_uid] = (response_data, audio, deliver)
+        jobs.move_to_end(response_data.audio_uid)
+        if waiting is None:
+            self._size += 1
+        else:
+            self._seconds -= len(waiting[1]) / SAMPLE_RATE
+        self._seconds += len(audio) / SAMPLE_RATE
+        self._event.set()
+        return True
+
+    def discard(self, deliver):
+        """
+        Drop every waiting job whose result goes to `deliver` (e.g. of a closed connection).
+
+        :rtype: int
+            The number of jobs dropped.
+        """
+        dropped = 0
+        for key, jobs in list(self._queues.items()):
+            for audio_uid, job in list(jobs.items()):
+                if job[2] == deliver:
+                    del jobs[audio_uid]
+                    self._size -= 1
+                    self._seconds -= len(job[1]) / SAMPLE_RATE
+                    dropped += 1
+            if not jobs:
+                del self._queues[key]
+        return dropped
+
+    async def get(self):
+        """
+        Wait for the next job, taking turns between the devices.
+
+        :rtype: tuple
+            (response_data, audio, deliver)
+        """
+        while not self._size:
+            self._event.clear()
+            await self._event.wait()
+        key, jobs = next(iter(self._queues.items()))
+        _, job = jobs.popitem(last=False)
+        self._size -= 1
+        self._seconds -= len(job[1]) / SAMPLE_RATE
+        if jobs:
+            # This device had its turn, the others go first
+            self._queues.move_to_end(key)
+        else:
+            del self._queues[key]
+        return job
+
+
+class ResultBroker:
+    """
+    Push finished results to the subscribers of their meeting (e.g. open SSE connections).
+
+    Every subscriber gets its own bounded `asyncio.Queue` and only receives the
+    results of the meeting it subscribed to (all meetings if it gave none). A
+    subscriber that stops reading loses its oldest results instead of blocking the others.
+    """
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        # meeting_id (None for every meeting) -> subscriber queues
+        self._subscribers = {}
+
+    def subscribe(self, meeting_id=None):
+        """
+        :param meeting_id: str
+            Only receive the results of this meeting, every result if None.
+        :rtype: asyncio.Queue
+            The queue the results are pushed to, `None` marks the end of the stream.
+        """
+        queue = asyncio.Queue(maxsize=self.maxsize)
+        self._subscribers.setdefault(meeting_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, queue, meeting_id=None):
+        queues = self._subscribers.get(meeting_id, set())
+        queues.discard(queue)
+        if not queues:
+            self._subscribers.pop(meeting_id, None)
+
+    def publish(self, result, meeting_id=None):
+        """Push a result to the subscribers of `meeting_id` and to those of every meeting, without waiting."""
+        for queue in self._subscribers.get(meeting_id, set()) | self._subscribers.get(None, set()):
+            self._push(queue, result)
+
+    def close(self, meeting_id=None):
+        """End the streams of the subscribers of `meeting_id` (of every subscriber if None)."""
+        groups = [self._subscribers.get(meeting_id, set())] if meeting_id is not None else list(self._subscribers.values())
+        for queues in groups:
+            for queue in list(queues):
+                self._push(queue, None)
+
+    @staticmethod
+    def _push(queue, result):
+        if queue.full():
+            queue.get_nowait()
+            logger.info(" | A result subscriber is lagging, its oldest result has been dropped. | ")
+        queue.put_nowait(result)
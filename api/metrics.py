@@ -0,0 +1,143 @@
+import math
+import threading
+
+from lib.constant import LATENCY_BUCKETS
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    """A metric family: one value (or histogram) per combination of label values."""
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """A gauge set explicitly, or read from `function` at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, function):
+        """
+        :param function: callable
+            Returns the value, or a dict of {label values tuple: value} for a labelled gauge.
+        """
+        self.function = function
+
+    def render(self):
+        if self.function is not None:
+            value = self.function()
+            values = value if isinstance(value, dict) else {(): value}
+            with self._lock:
+                self._values = {key if isinstance(key, tuple) else (key,): v for key, v in values.items()}
+        return super().render()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = [(key, (list(counts), total)) for key, (counts, total) in self._values.items()]
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """In-process metrics rendered in the Prometheus text exposition format."""
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+DECODE_SECONDS = REGISTRY.register(Histogram("asr_decode_seconds", "ASR model forward time per request or batch.", ["model"]))
+TRANSCRIBE_SECONDS = REGISTRY.register(Histogram("asr_transcribe_seconds", "End-to-end transcription time of a clip (VAD, queueing, decode, punctuation).", ["model"]))
+PUNCTUATION_SECONDS = REGISTRY.register(Histogram("asr_punctuation_seconds", "Punctuation restoration time."))
+TRANSLATE_SECONDS = REGISTRY.register(Histogram("translate_seconds", "Translation backend time (cache misses only).", ["method"]))
+MODEL_LOAD_SECONDS = REGISTRY.register(Histogram("model_load_seconds", "Time to load a model into the pool.", ["model"], buckets=(1, 5, 10, 30, 60, 120, 300)))
+FALLBACKS = REGISTRY.register(Counter("asr_temperature_fallbacks_total", "Whisper re-decodes at a higher temperature.", ["model"]))
+TIMEOUTS = REGISTRY.register(Counter("inference_timeouts_total", "Jobs stopped at their deadline.", ["stage"]))
+REAL_TIME_FACTOR = REGISTRY.register(Gauge("asr_real_time_factor", "Moving average of inference seconds per audio second.", ["model"]))
+QUEUE_DEPTH = REGISTRY.register(Gauge("queue_depth", "Jobs waiting in the job queue."))
+IN_FLIGHT = REGISTRY.register(Gauge("in_flight_jobs", "Jobs currently being transcribed / translated."))
+REJECTED = REGISTRY.register(Gauge("admission_rejected", "Requests rejected by admission control since startup."))
+CACHE_HIT_RATE = REGISTRY.register(Gauge("translate_cache_hit_rate", "Translation cache hit rate since startup."))
+VAD_SKIP_RATE = REGISTRY.register(Gauge("vad_skip_rate", "Share of request clips skipped as silent since startup, streaming windows not counted."))
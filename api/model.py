@@ -1,20 +1,36 @@
 import os  
-import gc  
 import time  
 import torch
 import whisper  
+import asyncio  
 import logging  
+import logging.handlers  
+import functools  
+import threading  
 
 from googletrans import Translator  
-from funasr import AutoModel  
-from queue import Queue  
+from concurrent.futures import ThreadPoolExecutor  
 
 # from api.gemma_translate import Gemma4BTranslate  
 from api.ollama_translate import OllamaChat
 from api.gpt_translate import Gpt4oTranslate  
+from api.async_translate import AsyncOllamaChat, AsyncGpt4oTranslate, close_after
+from api.stub_backends import StubGoogleTranslator, StubChatTranslator, StubGptTranslator, StubASR
+from api.ct2_whisper import CT2Whisper
+from api.onnx_funasr import OnnxSenseVoice, OnnxPunc
 
+from api.audio_utils import load_audio_file
+from api.vad import EnergyVAD
+from api.batching import BatchScheduler
+from api.admission import AdmissionController
+from api.metrics import DECODE_SECONDS, TRANSCRIBE_SECONDS, PUNCTUATION_SECONDS, TRANSLATE_SECONDS, MODEL_LOAD_SECONDS, FALLBACKS
+from api.model_pool import ModelPool
+from api.translate_cache import TranslationCache
+from api.deadline import Deadline, DeadlineWhisper, InferenceTimeout
+from api.short_clip import ShortClipWhisper, short_clip_mel
 from api.text_postprocess import extract_sensevoice_result_text
-from lib.constant import ModlePath, OPTIONS, SV_OPTIONS, SENSEVOCIE_PARMATER, IS_PUNC, PUNC_PARMATER, OLLAMA_MODEL
+from api.streaming import tokenize
+from lib.constant import ModlePath, DecodeOptions, SENSEVOCIE_PARMATER, IS_PUNC, IS_VAD, PUNC_PARMATER, OLLAMA_MODEL, INFERENCE_WORKERS, IS_BATCH, BATCH_WINDOW_MS, MAX_BATCH_SIZE, TRANSLATE_CACHE, MODEL_MEMORY_BUDGET_MB, MODEL_MEMORY_MB, OPTIONS, WARMUP_AUDIO, WARMUP_ROUNDS, SAMPLE_RATE, STUB_BACKENDS, TRANSLATE_BATCH, ASYNC_HTTP, FALLBACK_POLICY, SHORT_CLIP, CT2_MODELS, CT2_PARAMETER, ONNX_PARAMETER, SENSEVOICE_PUNC
   
   
 logger = logging.getLogger(__name__)  
@@ -42,121 +58,818 @@ logger.setLevel(logging.INFO)
 logger.propagate = False  
 
 class Model:  
-    def __init__(self):  
-        """Initialize the Model class with default attributes."""  
+    def __init__(self, stub_translators=False, stub_latency=0.0):  
+        """  
+        Initialize the Model class with default attributes.  
+  
+        :param stub_translators: bool  
+            Use offline stub translators instead of google / ollama / gpt-4o (benchmarks and load tests).  
+        :param stub_latency: float  
+            Seconds every stub translation sleeps, to simulate the network round trip.  
+        """  
         self.models_path = ModlePath()  
+        self.stub_translators = stub_translators  
+        self.stub_latency = stub_latency  
         # self.gemma_translator = Gemma4BTranslate()  
-        self.ollama_translator = OllamaChat(OLLAMA_MODEL['gemma'])  
-        self.gpt4o_translator = Gpt4oTranslate()  
-        self.google_translator = Translator()  
+        if stub_translators:  
+            self.ollama_translator = StubChatTranslator(stub_latency)  
+            self.gpt4o_translator = StubGptTranslator(stub_latency)  
+            self.google_translator = StubGoogleTranslator(stub_latency)  
+            # The async paths run the stubs in a thread  
+            self.async_ollama_translator = None  
+            self.async_gpt4o_translator = None  
+        else:  
+            self.ollama_translator = OllamaChat(OLLAMA_MODEL['gemma'])  
+            self.gpt4o_translator = Gpt4oTranslate()  
+            self.google_translator = Translator()  
+            # Pooled async clients for concurrent (e.g. multi-target) translations  
+            self.async_ollama_translator = AsyncOllamaChat(OLLAMA_MODEL['gemma'])  
+            self.async_gpt4o_translator = AsyncGpt4oTranslate()  
+        # Replaced async clients waiting to be closed, by their closing task  
+        self.closing_translators = {}  
         self.device = "cuda" if torch.cuda.is_available() else "cpu"  
         self.model = None  
         self.model_version = None  
         self.punc_model = None  
         self.translate_method = "google"  
-        self.processing = None  
-        self.result_queue = Queue()  
+        # Repeated short utterances are answered from the cache instead of the backend  
+        self.translate_cache = TranslationCache(**TRANSLATE_CACHE)  
+        # Bounded worker pool that runs every transcription / translation job  
+        self.executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")  
+        # ASR forward passes are serialized (whisper installs kv-cache hooks on the shared modules)  
+        self.model_lock = threading.Lock()  
+        # Loaded models stay resident so switching between them is a pointer swap  
+        self.model_pool = ModelPool(MODEL_MEMORY_BUDGET_MB, MODEL_MEMORY_MB)  
+        self.load_lock = threading.Lock()  
+        # Loads run one at a time in the background while the active model keeps serving  
+        self.loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-loader")  
+        self.load_state = "idle"  # idle / loading / warming / ready / failed  
+        self.state_lock = threading.Lock()  
+        self.loading_model = None  
+        self.load_error = None  
+        # Measures the RTF of every model and rejects work when the inference path is saturated  
+        self.admission = AdmissionController()  
+        # Silent clips are skipped before they reach the ASR model  
+        self.vad = EnergyVAD()  
+        # Concurrent short Whisper clips are decoded together in one forward pass  
+        self.whisper_batcher = BatchScheduler(self._transcribe_whisper_batch, BATCH_WINDOW_MS, MAX_BATCH_SIZE, name="whisper-batch")  
+        # Concurrent SenseVoice clips share one generate call, and their punctuation another  
+        self.sensevoice_batcher = BatchScheduler(self._transcribe_sensevoice_batch, BATCH_WINDOW_MS, MAX_BATCH_SIZE, name="sensevoice-batch")  
+  
+    def start_load_model(self, models_name, engine_options=None):  
+        """  
+        Load a model in the background without blocking the caller.  
+  
+        :param models_name: str  
+            The name of the model to be loaded.  
+        :param engine_options: dict  
+            Optional CTranslate2 settings of a ct2_* model (compute_type, intra_threads, inter_threads).  
+        :rtype: concurrent.futures.Future  
+            A future resolving once the model is active (or the load failed).  
+        :raises RuntimeError: If another load is still in progress.  
+        """  
+        with self.state_lock:  
+            if self.load_state in ("loading", "warming"):  
+                raise RuntimeError(f"model '{self.loading_model}' is still {self.load_state}")  
+            self.load_state, self.loading_model, self.load_error = "loading", models_name, None  
+        return self.loader.submit(self.load_model, models_name, engine_options)  
+  
+    def get_load_state(self):  
+        """  
+        :rtype: dict  
+            The load state, the model being loaded, the active model and the last load error.  
+        """  
+        with self.state_lock:  
+            return {  
+                "state": self.load_state,  
+                "loading_model": self.loading_model,  
+                "model_version": self.model_version,  
+                "error": self.load_error,  
+            }  
   
-    def load_model(self, models_name):  
-        """Load the specified model based on the model's name."""  
+    def load_model(self, models_name, engine_options=None):  
+        """  
+        Make the specified model the active one.  
+  
+        Resident models are switched to by a pointer swap. Otherwise the weights are  
+        loaded next to the active model (which keeps serving) and least recently used  
+        models are evicted to stay within MODEL_MEMORY_BUDGET_MB. If the new model  
+        cannot fit next to the active one the load fails with "insufficient memory" and  
+        the active model keeps serving. Freshly  
+        loaded models are warmed up before they are swapped in. A resident ct2_* model  
+        is reloaded if `engine_options` ask for other settings.  
+        """  
         start = time.time()  
-        try:  
-            # Release old model resources  
-            self._release_model()  
-            self.model_version = models_name  
-  
-            # Choose model weight  
-            if models_name == "large_v2":  
-                self.model = whisper.load_model(self.models_path.large_v2)  
-                self.model.to(self.device)  
-            elif models_name == "medium":  
-                self.model = whisper.load_model(self.models_path.medium)  
-                self.model.to(self.device)  
-            elif models_name == "sensevoice":  
-                self.model = AutoModel(**SENSEVOCIE_PARMATER)  
-                if IS_PUNC:  
-                    start = time.time()  
-                    logger.info(" | Start to loading punch model. | ")  
-                    self.punc_model = AutoModel(**PUNC_PARMATER)  
-                    end = time.time()  
-                    logger.info(f" | Model 'ct-punc' loaded in {end - start:.2f} seconds. | ")  
+        settings = {**CT2_PARAMETER, **(engine_options or {})} if models_name in CT2_MODELS else None  
+        with self.load_lock:  
+            # The load state is only written under `state_lock`, so readers see it together with the matching model version  
+            with self.state_lock:  
+                self.load_state, self.loading_model, self.load_error = "loading", models_name, None  
+            try:  
+                resident = self.model_pool.get(models_name)  
+                resident = resident is not None and (settings is None or resident.settings == settings)  
+                model = self._get_or_load(models_name, settings)  
+                punc_model = self._get_or_load(SENSEVOICE_PUNC[models_name], keep={models_name}) if models_name in SENSEVOICE_PUNC and IS_PUNC else None  
+                if not resident:  
+                    with self.state_lock:  
+                        self.load_state = "warming"  
+                    self._warm_up(models_name, model, punc_model)  
+            except Exception as e:  
+                logger.error(f' | load_model() models_name: {models_name} error: {e} | ')  
+                with self.state_lock:  
+                    self.load_state, self.load_error = "failed", str(e)  
+                    if self.model is None:  
+                        self.model_version = None  
+                return  
+  
+            # Hold the model lock so no inference sees a half-swapped model  
+            with self.state_lock, self.model_lock:  
+                self.model, self.punc_model, self.model_version = model, punc_model, models_name  
+                self.load_state, self.loading_model = "ready", None  
             end = time.time()  
-            logger.info(f" | Model '{models_name}' loaded in {end - start:.2f} seconds. | ")  
-        except Exception as e:  
-            self.model_version = None  
-            logger.error(f' | load_model() models_name: {models_name} error: {e} | ')  
-  
-    def _release_model(self):  
-        """Release the resources occupied by the current model."""  
-        if self.model is not None:  
-            del self.model  
-            gc.collect()  
-            self.model = None  
-            torch.cuda.empty_cache()  
-            logger.info(" | Previous model resources have been released. | ")  
+            logger.info(f" | Model '{models_name}' is active after {end - start:.2f} seconds. | ")  
+  
+    def _warm_up(self, models_name, model, punc_model=None):  
+        """Run a few inferences on a freshly loaded model before it serves traffic."""  
+        start = time.time()  
+        audio = load_audio_file(WARMUP_AUDIO)  
+        options = DecodeOptions(language="en")  
+        for _ in range(WARMUP_ROUNDS):  
+            if models_name in SENSEVOICE_PUNC:  
+                text = model.generate(input=audio, **options.sensevoice_options())[0]['text']  
+                if punc_model is not None:  
+                    punc_model.generate(input=text)  
+            else:  
+                model.transcribe(audio, **options.whisper_options())  
+        end = time.time()  
+        logger.info(f" | Model '{models_name}' warmed up in {end - start:.2f} seconds. | ")  
+  
+    def _get_or_load(self, name, settings=None, keep=()):  
+        """  
+        Return the resident model `name`, loading it into the pool if needed (caller holds `load_lock`).  
+  
+        :param keep: set  
+            Resident models that must not be evicted to make room, besides the active one.  
+        :raises MemoryError: If `name` does not fit next to the active model.  
+        """  
+        model = self.model_pool.get(name)  
+        if model is not None and (settings is None or model.settings == settings):  
+            return model  
+        if model is not None and name != self.model_version:  
+            # Resident with other CTranslate2 settings, load it again  
+            self.model_pool.evict(name)  
+        # The active instance keeps serving and stays accounted until `model_pool.put` replaces it  
+  
+        keep = {*keep, self.model_version, SENSEVOICE_PUNC[self.model_version]} if self.model_version in SENSEVOICE_PUNC else {*keep, self.model_version}  
+        if not self.model_pool.make_room(name, keep=keep):  
+            # Refuse rather than take the active model down, it keeps serving  
+            raise MemoryError(f"insufficient memory: '{name}' does not fit next to {sorted(k for k in keep if k)} within {self.model_pool.budget_mb} MB")  
+  
+        start = time.time()  
+        logger.info(f" | Start to loading model '{name}'. | ")  
+        # Choose model weight  
+        if name == "large_v2":  
+            model = whisper.load_model(self.models_path.large_v2, device=self.device)  
+        elif name == "medium":  
+            model = whisper.load_model(self.models_path.medium, device=self.device)  
+        elif name == "tiny":  
+            # Small enough for CPU-only benchmarks  
+            model = whisper.load_model(self.models_path.tiny, device=self.device)  
+        elif name in CT2_MODELS:  
+            model = CT2Whisper(getattr(self.models_path, name), **settings)  
+        elif name == "stub":  
+            # No weights at all, for load tests without a GPU  
+            model = StubASR(STUB_BACKENDS["asr_rtf"], SAMPLE_RATE)  
+        elif name == "sensevoice":  
+            # FunASR (and ModelScope behind it) is only imported when a PyTorch FunASR model is loaded  
+            from funasr import AutoModel  
+            model = AutoModel(**SENSEVOCIE_PARMATER)  
+        elif name == "punc":  
+            from funasr import AutoModel  
+            model = AutoModel(**PUNC_PARMATER)  
+        elif name == "sensevoice_onnx":  
+            # ONNX Runtime graphs, no FunASR / ModelScope stack at inference time  
+            model = OnnxSenseVoice(ONNX_PARAMETER["sensevoice"], ONNX_PARAMETER["quantize"], ONNX_PARAMETER["intra_op_num_threads"], ONNX_PARAMETER["device_id"])  
+        elif name == "punc_onnx":  
+            model = OnnxPunc(ONNX_PARAMETER["punc"], ONNX_PARAMETER["quantize"], ONNX_PARAMETER["intra_op_num_threads"], ONNX_PARAMETER["device_id"])  
+        else:  
+            raise ValueError(f"unknown model '{name}'")  
+        end = time.time()  
+        MODEL_LOAD_SECONDS.observe(end - start, model=name)  
+        logger.info(f" | Model '{name}' loaded in {end - start:.2f} seconds. | ")  
+        self.model_pool.put(name, model)  
+        return model  
+  
+    def run_in_executor(self, func, *args):  
+        """  
+        Run a blocking job on the inference worker pool.  
+  
+        :param func: callable  
+            The blocking function to be executed.  
+        :param args: tuple  
+            The positional arguments passed to the function.  
+        :rtype: asyncio.Future  
+            An awaitable future resolving to the return value of the function.  
+        """  
+        loop = asyncio.get_running_loop()  
+        return loop.run_in_executor(self.executor, functools.partial(func, *args))  
+  
+    def shutdown(self):  
+        """Stop accepting new jobs and release the inference worker pool."""  
+        self.executor.shutdown(wait=False, cancel_futures=True)  
+        self.loader.shutdown(wait=False, cancel_futures=True)  
+        self.whisper_batcher.close()  
+        self.sensevoice_batcher.close()  
+  
+    async def close_async_translators(self):  
+        """Close the pooled async clients, replaced ones still waiting to be closed included."""  
+        translators = [self.async_ollama_translator, self.async_gpt4o_translator]  
+        for task, translator in list(self.closing_translators.items()):  
+            task.cancel()  
+            translators.append(translator)  
+        for translator in translators:  
+            if translator is not None:  
+                await translator.close()  
   
     def change_translate_method(self, method_name):  
         """  
         Change the translation method used by the model.  
   
+        Called on the event loop. The replaced async client is closed there once the  
+        translations still using it had their timeout to finish.  
+  
         :param method_name: str  
             The name of the translation method to be used.  
         :rtype: None  
         """  
         if not self.translate_method == method_name and method_name in OLLAMA_MODEL:
+            old_async_translator = self.async_ollama_translator
             try:
                 self.ollama_translator.close()
-                self.ollama_translator = OllamaChat(OLLAMA_MODEL[method_name])
+                self.ollama_translator = StubChatTranslator(self.stub_latency) if self.stub_translators else OllamaChat(OLLAMA_MODEL[method_name])
+                self.async_ollama_translator = None if self.stub_translators else AsyncOllamaChat(OLLAMA_MODEL[method_name])
                 logger.info(f" | old ollama has been released. Initial '{method_name}' has been successful | ")          
             except Exception as e:
                 logger.error(f" | ollama translate method change error: {e} | ")
-                self.ollama_translator = OllamaChat(OLLAMA_MODEL['gemma'])
+                self.ollama_translator = StubChatTranslator(self.stub_latency) if self.stub_translators else OllamaChat(OLLAMA_MODEL['gemma'])
+                self.async_ollama_translator = None if self.stub_translators else AsyncOllamaChat(OLLAMA_MODEL['gemma'])
                 logger.info(f" | Initial the default ollama model 'gemma' | ")          
+            if old_async_translator is not None and old_async_translator is not self.async_ollama_translator:
+                # Keep a reference, the event loop only holds tasks weakly
+                task = asyncio.get_running_loop().create_task(close_after(old_async_translator, ASYNC_HTTP["timeout"]))
+                self.closing_translators[task] = old_async_translator
+                task.add_done_callback(lambda task: self.closing_translators.pop(task, None))
         self.translate_method = method_name  
 
-    def transcribe(self, audio_file_path, ori):  
+    def decode_options(self, ori, profile="realtime"):  
         """  
-        Perform transcription on the given audio file.  
+        Build the decode options of a request from the temperature fallback policy.  
     
-        :param audio_file_path: str  
-            The path to the audio file to be transcribed.  
         :param ori: str  
             The original language of the audio.  
+        :param profile: str  
+            The endpoint profile in FALLBACK_POLICY ("realtime" or "offline").  
+        :rtype: DecodeOptions  
+        """  
+        policies = FALLBACK_POLICY[profile]  
+        return DecodeOptions(language=ori, **policies.get(self.model_version, policies["default"]))  
+  
+    def transcribe(self, audio, ori, deadline=None, options=None, stats=None, count_vad=True):  
+        """  
+        Perform transcription on the given audio.  
+    
+        Safe to call from several workers at once: all per-request settings travel in  
+        `options`, and the shared model is only touched while holding `model_lock`.  
+    
+        :param audio: np.ndarray | str  
+            The float32 16 kHz waveform to be transcribed, or the path to an audio file.  
+        :param ori: str  
+            The original language of the audio.  
+        :param deadline: Deadline  
+            Optional deadline, checked before the model runs and between Whisper decode windows.  
+        :param options: DecodeOptions  
+            Optional per-request decode options, the "realtime" fallback policy by default.  
+        :param stats: dict  
+            Optional dict that receives per-request decode stats ("fallbacks", "vad_skipped", "vad_trimmed_seconds").  
+        :param count_vad: bool  
+            Count the clip in the VAD skip rate, False for streaming windows.  
         :rtype: tuple  
             A tuple containing the original transcription and inference time.  
+        :raises InferenceTimeout: If the deadline passes, carrying the partial transcription.  
         :logs: Inference status and time.  
         """  
-        # Set the language option for transcription  
-        OPTIONS["language"] = ori  
-        SV_OPTIONS["language"] = ori
-        
         start = time.time()  # Start timing the transcription process  
+        if options is None:  
+            options = self.decode_options(ori)  
     
-        if self.model_version == "sensevoice":  
-            # Perform transcription using the SenseVoice model  
-            result = self.model.generate(audio_file_path, **SV_OPTIONS)  
+        if isinstance(audio, str):  
+            # Decode files in-process so neither branch needs to spawn ffmpeg  
+            audio = load_audio_file(audio)  
+        audio_seconds = len(audio) / SAMPLE_RATE  
+    
+        if IS_VAD:  
+            audio = self.vad.trim(audio, count=count_vad)  
+            if stats is not None:  
+                stats["vad_skipped"] = audio is None  
+                stats["vad_trimmed_seconds"] = audio_seconds - (len(audio) / SAMPLE_RATE if audio is not None else 0.0)  
+            if audio is None:  
+                # No speech in the clip, skip the ASR model entirely  
+                logger.debug(" | VAD found no speech, clip skipped. | ")  
+                return "", time.time() - start  
+    
+        if IS_BATCH and isinstance(self.model, whisper.model.Whisper) and len(audio) <= whisper.audio.N_SAMPLES:  
+            # Short Whisper clips join the next micro-batch with the same options  
+            ori_pred = self.whisper_batcher.submit((audio, deadline, stats), key=options).result()  
+        elif IS_BATCH and self.model_version in SENSEVOICE_PUNC and len(audio) <= whisper.audio.N_SAMPLES:  
+            ori_pred = self.sensevoice_batcher.submit((audio, deadline), key=options).result()  
+        elif isinstance(self.model, CT2Whisper) and self.model.inter_threads > 1:  
+            # CTranslate2 runs `inter_threads` transcriptions at once, only the model reference is taken under the lock  
+            with self.model_lock:  
+                model = self.model  
+                if deadline is not None:  
+                    deadline.check("transcribe")  
+                if not isinstance(model, CT2Whisper):  
+                    # The model was swapped in the meantime  
+                    ori_pred = self._transcribe(audio, options, deadline, stats)  
+            if isinstance(model, CT2Whisper):  
+                ori_pred = self._transcribe_ct2(model, audio, options, deadline, stats)  
+        elif isinstance(self.model, whisper.model.Whisper) and self._use_short_clip(options, len(audio)):  
+            # Without micro-batching, short clips still skip the 30 s padding  
+            ori_pred = self._transcribe_whisper_batch(options, [(audio, deadline, stats)])[0]  
+            if isinstance(ori_pred, Exception):  
+                raise ori_pred  
+        else:  
+            with self.model_lock:  
+                if deadline is not None:  
+                    # The deadline may have passed while waiting for the model  
+                    deadline.check("transcribe")  
+                ori_pred = self._transcribe(audio, options, deadline, stats)  
+    
+        end = time.time()  # End timing the transcription process  
+        # End to end, including lock and batch waits; the RTF is recorded where the model runs  
+        inference_time = end - start  # Calculate the time taken for transcription  
+        TRANSCRIBE_SECONDS.observe(inference_time, model=self.model_version)  
+    
+        logger.debug(f" | Inference time {inference_time} seconds. | ")  # Log the inference time  
+    
+        return ori_pred, inference_time  # Return the transcription and inference time  
+  
+    def _transcribe(self, audio, options, deadline=None, stats=None):  
+        """Run the loaded ASR model on a decoded waveform (caller holds `model_lock`) and record its RTF."""  
+        busy_start = time.time()  
+        if self.model_version in SENSEVOICE_PUNC:  
+            # Perform transcription using the SenseVoice model (FunASR or ONNX Runtime)  
+            start = time.time()  
+            result = self.model.generate(input=audio, **options.sensevoice_options())  
+            DECODE_SECONDS.observe(time.time() - start, model=self.model_version)  
             ori_pred = result[0]['text']  
             
             if IS_PUNC:  
+                if deadline is not None:  
+                    deadline.check("punctuation", extract_sensevoice_result_text(ori_pred.lower()))  
                 # Add punctuation to the transcription if IS_PUNC is enabled  
-                ori_pred = self.punc_model.generate(input=ori_pred)  
-                ori_pred = ori_pred[0]['text']  
+                ori_pred = self._punctuate([ori_pred])[0]  
             
             ori_pred = extract_sensevoice_result_text(ori_pred.lower())  # Extract and clean the transcription text  
+        elif self.model_version == "stub":  
+            # Deterministic stub for load tests, no deadline checks between windows  
+            ori_pred = self.model.transcribe(audio, **options.whisper_options())['text']  
+        elif isinstance(self.model, CT2Whisper):  
+            return self._transcribe_ct2(self.model, audio, options, deadline, stats)  
         else:  
             # Perform transcription using a different model  
-            result = self.model.transcribe(audio_file_path, **OPTIONS)  
+            start = time.time()  
+            # Check the deadline between decode windows and apply the fallback policy  
+            proxy = DeadlineWhisper(self.model, deadline or Deadline(), options.max_fallbacks, options.min_fallback_remaining)  
+            result = whisper.transcribe(proxy, audio, **options.whisper_options())  
+            DECODE_SECONDS.observe(time.time() - start, model=self.model_version)  
+            if proxy.fallbacks:  
+                FALLBACKS.inc(proxy.fallbacks, model=self.model_version)  
+            if stats is not None:  
+                stats["fallbacks"] = proxy.fallbacks  
             logger.debug(result)  # Log the transcription result  
             ori_pred = result['text']  
     
-        end = time.time()  # End timing the transcription process  
-        inference_time = end - start  # Calculate the time taken for transcription  
-    
-        logger.debug(f" | Inference time {inference_time} seconds. | ")  # Log the inference time  
-    
-        return ori_pred, inference_time  # Return the transcription and inference time  
+        self.admission.record(self.model_version, len(audio) / SAMPLE_RATE, time.time() - busy_start)  
+        return ori_pred  
+  
+    def _transcribe_ct2(self, model, audio, options, deadline=None, stats=None):  
+        """Run a CTranslate2 Whisper engine, capping its temperature schedule with the fallback policy."""  
+        start = time.time()  
+        result = model.transcribe(audio, deadline=deadline, max_fallbacks=options.max_fallbacks,  
+                                  min_fallback_remaining=options.min_fallback_remaining, **options.whisper_options())  
+        DECODE_SECONDS.observe(time.time() - start, model=self.model_version)  
+        self.admission.record(self.model_version, len(audio) / SAMPLE_RATE, time.time() - start)  
+        if result['fallbacks']:  
+            FALLBACKS.inc(result['fallbacks'], model=self.model_version)  
+        if stats is not None:  
+            stats["fallbacks"] = result['fallbacks']  
+        logger.debug(result)  
+        return result['text']  
+  
+    def _punctuate(self, texts):  
+        """  
+        Add punctuation to SenseVoice outputs with one ct-punc call (caller holds `model_lock`).  
+  
+        Empty and one-word texts have nothing to punctuate and are passed through.  
+        """  
+        indexes = [index for index, text in enumerate(texts) if len(tokenize(extract_sensevoice_result_text(text.lower()))) > 1]  
+        if not indexes:  
+            return list(texts)  
+        start = time.time()  
+        result = self.punc_model.generate(input=[texts[index] for index in indexes])  
+        PUNCTUATION_SECONDS.observe(time.time() - start)  
+        punctuated = list(texts)  
+        for index, item in zip(indexes, result):  
+            punctuated[index] = item['text']  
+        return punctuated  
+  
+    def _transcribe_sensevoice_batch(self, options, items):  
+        """  
+        Transcribe a batch of clips with a single SenseVoice `generate` call.  
+  
+        The clips are padded to the longest one by SenseVoice, then punctuation runs  
+        over all the resulting texts at once.  
+  
+        :param options: DecodeOptions  
+            The decode options shared by the whole batch.  
+        :param items: list  
+            (audio, deadline) pairs.  
+        :rtype: list  
+            One transcription (or InferenceTimeout) per item.  
+        """  
+        results = [None] * len(items)  
+        live = []  
+        for index, (audio, deadline) in enumerate(items):  
+            if deadline is not None and deadline.expired():  
+                results[index] = InferenceTimeout("transcribe")  
+            else:  
+                live.append(index)  
+        if not live:  
+            return results  
+  
+        with self.model_lock:  
+            if self.model_version not in SENSEVOICE_PUNC:  
+                # The model was swapped while the batch was collected  
+                for index in live:  
+                    results[index] = self._transcribe(items[index][0], options)  
+                return results  
+  
+            start = time.time()  
+            decoded = self.model.generate(input=[items[index][0] for index in live], batch_size=len(live), **options.sensevoice_options())  
+            DECODE_SECONDS.observe(time.time() - start, model=self.model_version)  
+            texts = [item['text'] for item in decoded]  
+            if IS_PUNC:  
+                texts = self._punctuate(texts)  
+            # One RTF sample per batch: its compute time over all the audio it carried  
+            self.admission.record(self.model_version, sum(len(items[index][0]) for index in live) / SAMPLE_RATE, time.time() - start)  
+  
+        for index, text in zip(live, texts):  
+            results[index] = extract_sensevoice_result_text(text.lower())  # Extract and clean the transcription text  
+        logger.debug(f" | SenseVoice batch of {len(live)} clips decoded. | ")  
+        return results  
+  
+    def _use_short_clip(self, options, length):  
+        """  
+        Whether clips of up to `length` samples run in short-clip encoder mode.  
+  
+        The mode is on for the models in SHORT_CLIP["models"] unless the request's  
+        `options.short_clip` says otherwise.  
+        """  
+        enabled = options.short_clip if options.short_clip is not None else self.model_version in SHORT_CLIP["models"]  
+        return enabled and length <= SHORT_CLIP["max_seconds"] * SAMPLE_RATE  
   
-    def translate(self, ori_pred, ori, tar):  
+    def _transcribe_whisper_batch(self, options, items):  
+        """  
+        Transcribe a batch of clips (each at most 30 s) with a single Whisper pass.  
+  
+        Every clip is padded or trimmed to a 30 s log-mel spectrogram (or, in short-clip  
+        mode, to the reduced window of the longest clip), the mels are stacked and  
+        encoded together, then greedily decoded as one batch. Clips that fail whisper's  
+        compression / logprob checks are decoded again at the next temperature of the  
+        fallback policy, all failing clips in one batched pass per temperature. A clip  
+        only falls back while its own deadline has `min_fallback_remaining` seconds left.  
+  
+        :param options: DecodeOptions  
+            The decode options shared by the whole batch.  
+        :param items: list  
+            (audio, deadline, stats) tuples.  
+        :rtype: list  
+            One transcription (or InferenceTimeout) per item.  
+        """  
+        results = [None] * len(items)  
+        live = []  
+        for index, (audio, deadline, _) in enumerate(items):  
+            if deadline is not None and deadline.expired():  
+                results[index] = InferenceTimeout("transcribe")  
+            else:  
+                live.append(index)  
+        if not live:  
+            return results  
+  
+        with self.model_lock:  
+            if not isinstance(self.model, whisper.model.Whisper):  
+                # The model was swapped while the batch was collected  
+                for index in live:  
+                    audio, deadline, stats = items[index]  
+                    results[index] = self._transcribe(audio, options, deadline, stats)  
+                return results  
+  
+            model = self.model  
+            busy_start = time.time()  
+            if self._use_short_clip(options, max(len(items[index][0]) for index in live)):  
+                mel = short_clip_mel([items[index][0] for index in live], model.dims.n_mels, model.device)  
+                model = ShortClipWhisper(model, mel.shape[-1])  
+            else:  
+                mel = torch.stack([  
+                    whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(items[index][0])), model.dims.n_mels)  
+                    for index in live  
+                ]).to(model.device)  
+            rows = dict(zip(live, range(len(live))))  
+            fallbacks = dict.fromkeys(live, 0)  
+            pending = live  
+            temperatures = options.temperature[:1 + options.max_fallbacks] if options.max_fallbacks is not None else options.temperature  
+            for round_index, temperature in enumerate(temperatures):  
+                if round_index:  
+                    # Fallbacks are charged to each clip's own deadline  
+                    pending = [index for index in pending  
+                               if items[index][1] is None or items[index][1].remaining() >= options.min_fallback_remaining]  
+                    if not pending:  
+                        break  
+                decoding_options = whisper.DecodingOptions(  
+                    language=options.language,  
+                    task=options.task,  
+                    temperature=temperature,  
+                    beam_size=options.beam_size if temperature == 0 else None,  
+                    prompt=options.initial_prompt,  
+                    without_timestamps=True,  
+                    fp16=options.fp16 and model.device.type == "cuda",  
+                )  
+                start = time.time()  
+                decoded = whisper.decode(model, mel[[rows[index] for index in pending]], decoding_options)  
+                DECODE_SECONDS.observe(time.time() - start, model=self.model_version)  
+                failing = []  
+                for index, result in zip(pending, decoded):  
+                    if round_index:  
+                        fallbacks[index] += 1  
+                    text, needs_fallback = self._check_decode(result, options)  
+                    results[index] = text  
+                    if needs_fallback:  
+                        failing.append(index)  
+                pending = failing  
+                if not pending:  
+                    break  
+            # One RTF sample per batch: its compute time over all the audio it carried  
+            self.admission.record(self.model_version, sum(len(items[index][0]) for index in live) / SAMPLE_RATE, time.time() - busy_start)  
+  
+        for index in live:  
+            stats = items[index][2]  
+            if fallbacks[index]:  
+                FALLBACKS.inc(fallbacks[index], model=self.model_version)  
+            if stats is not None:  
+                stats["fallbacks"] = fallbacks[index]  
+        logger.debug(f" | Whisper batch of {len(live)} clips decoded. | ")  
+        return results  
+  
+    @staticmethod  
+    def _check_decode(result, options):  
+        """  
+        Apply whisper.transcribe's fallback and silence rules to one decoded clip.  
+  
+        :rtype: tuple  
+            The text ("" for silence), and whether the clip should be decoded at the next temperature.  
+        """  
+        needs_fallback = result.compression_ratio > OPTIONS["compression_ratio_threshold"]  
+        if options.logprob_threshold is not None and result.avg_logprob < options.logprob_threshold:  
+            needs_fallback = True  
+        no_speech = options.no_speech_threshold is not None and result.no_speech_prob > options.no_speech_threshold  
+        if no_speech:  
+            needs_fallback = False  
+        if options.logprob_threshold is not None and result.avg_logprob > options.logprob_threshold:  
+            no_speech = False  
+        return ("" if no_speech else result.text), needs_fallback  
+  
+    def _translate_backend(self, translate_method, ollama_translator, ori_pred, ori, tar):  
+        """  
+        Call the translation backend of `translate_method`.  
+  
+        :rtype: tuple  
+            The translated text, and whether it came from the requested backend  
+            (google fallbacks and untranslated text are not worth caching).  
+        """  
+        cacheable = True  
+        if translate_method == "google":  
+            # Adjust language codes for Google Translate  
+            ori = 'zh-TW' if ori == 'zh' else ori  
+            tar = 'zh-TW' if tar == 'zh' else tar  
+            translated_pred = self.google_translator.translate(ori_pred, src=ori, dest=tar).text  
+        
+        elif translate_method == "gpt-4o":  
+            try:  
+                translated_pred = self.gpt4o_translator.translate(ori_pred, ori, tar)  
+                if "403_Forbidden" in translated_pred:  
+                    logger.error(f" | gpt-4o reject translate | use google translate to retry | ")  
+                    # Retry translation using Google Translate if GPT-4o translation is forbidden  
+                    ori = 'zh-TW' if ori == 'zh' else ori  
+                    tar = 'zh-TW' if tar == 'zh' else tar  
+                    translated_pred = self.google_translator.translate(ori_pred, src=ori, dest=tar).text  
+                    cacheable = False  
+            except Exception as e:  
+                logger.error(f" | gpt-4o translate error: {e} | use google translate to retry | ")  
+                # Retry translation using Google Translate if an error occurs with GPT-4o  
+                ori = 'zh-TW' if ori == 'zh' else ori  
+                tar = 'zh-TW' if tar == 'zh' else tar  
+                translated_pred = self.google_translator.translate(ori_pred, src=ori, dest=tar).text  
+                cacheable = False  
+        
+        # elif translate_method == "gemma":  
+        #     translated_pred = self.gemma_translator.translate(ori_pred, ori, tar)  
+        
+        elif translate_method in OLLAMA_MODEL:  
+            translated_pred = ollama_translator.chat(source_text=ori_pred, source_lang=ori, target_lang=tar)  
+        
+        else:  
+            translated_pred = ori_pred  # No translation needed if the method is not recognized  
+        
+        # Backends hand the source text back when they fail  
+        cacheable = cacheable and translated_pred != "" and translated_pred != ori_pred  
+        return translated_pred, cacheable  
+  
+    def _translate_backend_batch(self, translate_method, ollama_translator, texts, ori, tar):  
+        """  
+        Translate several segments of one language pair in as few backend calls as possible.  
+  
+        Google gets one newline-joined request, gpt-4o / ollama one numbered-list prompt.  
+        If a reply cannot be split back into the segments, each segment is sent on its own.  
+  
+        :rtype: list  
+            (translated text, cacheable) per segment.  
+        """  
+        translations = None  
+        try:  
+            if translate_method == "google":  
+                src = 'zh-TW' if ori == 'zh' else ori  
+                dest = 'zh-TW' if tar == 'zh' else tar  
+                reply = self.google_translator.translate("\n".join(" ".join(text.split()) for text in texts), src=src, dest=dest).text  
+                lines = reply.split("\n")  
+                translations = lines if len(lines) == len(texts) else None  
+            elif translate_method == "gpt-4o":  
+                translations = self.gpt4o_translator.translate_batch(texts, ori, tar)  
+            elif translate_method in OLLAMA_MODEL:  
+                translations = ollama_translator.chat_batch(texts, ori, tar)  
+        except Exception as e:  
+            logger.error(f" | batch translate '{translate_method}' error: {e} | retry segment by segment | ")  
+  
+        if translations is None:  
+            return [self._translate_backend(translate_method, ollama_translator, text, ori, tar) for text in texts]  
+        return [(translated.strip(), translated.strip() != "" and translated.strip() != text) for translated, text in zip(translations, texts)]  
+  
+    def translate_batch(self, segments):  
+        """  
+        Translate many segments (mixed language pairs allowed) with batched backend calls.  
+  
+        Cache hits are answered directly, the rest is grouped by language pair, split  
+        into chunks of TRANSLATE_BATCH size and the chunks are sent concurrently.  
+  
+        :param segments: list  
+            (text, original language, target language) tuples.  
+        :rtype: tuple  
+            The translations (in input order), the total time and the translation method used.  
+        """  
+        start = time.time()  
+        # Snapshot the method so a concurrent change_translate_method cannot switch it mid-request  
+        translate_method = self.translate_method  
+        ollama_translator = self.ollama_translator  
+        texts = [text if text != "." else "" for text, _, _ in segments]  
+        results = list(texts)  
+  
+        groups = {}  
+        for index, (text, (_, ori, tar)) in enumerate(zip(texts, segments)):  
+            if ori == tar or text == "":  
+                continue  
+            cached = self.translate_cache.get(translate_method, ori, tar, text)  
+            if cached is not None:  
+                results[index] = cached  
+            else:  
+                groups.setdefault((ori, tar), []).append(index)  
+  
+        chunks = []  
+        for (ori, tar), indexes in groups.items():  
+            chunk, chars = [], 0  
+            for index in indexes:  
+                if chunk and (len(chunk) >= TRANSLATE_BATCH["max_segments"] or chars + len(texts[index]) > TRANSLATE_BATCH["max_chars"]):  
+                    chunks.append((ori, tar, chunk))  
+                    chunk, chars = [], 0  
+                chunk.append(index)  
+                chars += len(texts[index])  
+            chunks.append((ori, tar, chunk))  
+  
+        def run(chunk):  
+            ori, tar, indexes = chunk  
+            backend_start = time.time()  
+            try:  
+                translated = self._translate_backend_batch(translate_method, ollama_translator, [texts[index] for index in indexes], ori, tar)  
+            except Exception as e:  
+                # Keep the source text of this chunk, like translate() does  
+                logger.error(f" | translate_batch() '{translate_method}' error: {e} | ")  
+                return  
+            TRANSLATE_SECONDS.observe(time.time() - backend_start, method=translate_method)  
+            for index, (translated_pred, cacheable) in zip(indexes, translated):  
+                results[index] = translated_pred  
+                if cacheable:  
+                    self.translate_cache.put(translate_method, ori, tar, texts[index], translated_pred)  
+  
+        if chunks:  
+            with ThreadPoolExecutor(max_workers=TRANSLATE_BATCH["concurrency"], thread_name_prefix="translate-batch") as pool:  
+                list(pool.map(run, chunks))  
+  
+        end = time.time()  
+        logger.info(f" | translate_batch() {len(segments)} segments in {len(chunks)} backend calls, {end - start:.2f} seconds. | ")  
+        return results, end - start, translate_method  
+  
+    async def _translate_backend_async(self, translate_method, ollama_translator, async_ollama_translator, ori_pred, ori, tar):  
+        """  
+        Async counterpart of `_translate_backend`.  
+  
+        gpt-4o and ollama go through the pooled async clients; google (googletrans is  
+        synchronous) and the stubs run in a thread.  
+  
+        :rtype: tuple  
+            The translated text, and whether it is worth caching.  
+        """  
+        if translate_method == "gpt-4o" and self.async_gpt4o_translator is not None:  
+            try:  
+                translated_pred = await self.async_gpt4o_translator.translate(ori_pred, ori, tar)  
+                if "403_Forbidden" not in translated_pred:  
+                    return translated_pred, translated_pred != "" and translated_pred != ori_pred  
+                logger.error(f" | gpt-4o reject translate | use google translate to retry | ")  
+            except Exception as e:  
+                logger.error(f" | gpt-4o translate error: {e} | use google translate to retry | ")  
+            # Retry translation using Google Translate, not worth caching  
+            translated_pred, _ = await asyncio.to_thread(self._translate_backend, "google", ollama_translator, ori_pred, ori, tar)  
+            return translated_pred, False  
+        if translate_method in OLLAMA_MODEL and async_ollama_translator is not None:  
+            translated_pred = await async_ollama_translator.chat(source_text=ori_pred, source_lang=ori, target_lang=tar)  
+            return translated_pred, translated_pred != "" and translated_pred != ori_pred  
+        return await asyncio.to_thread(self._translate_backend, translate_method, ollama_translator, ori_pred, ori, tar)  
+  
+    async def _translate_one_async(self, translate_method, ollama_translator, async_ollama_translator, ori_pred, ori, tar):  
+        """Translate one text to one target language through the cache and the async backend."""  
+        if ori == tar or ori_pred == '':  
+            return ori_pred  
+        translated_pred = self.translate_cache.get(translate_method, ori, tar, ori_pred)  
+        if translated_pred is not None:  
+            return translated_pred  
+        try:  
+            backend_start = time.time()  
+            translated_pred, cacheable = await self._translate_backend_async(translate_method, ollama_translator, async_ollama_translator, ori_pred, ori, tar)  
+            TRANSLATE_SECONDS.observe(time.time() - backend_start, method=translate_method)  
+        except Exception as e:  
+            logger.error(f" | translate_async() '{translate_method}' error: {e} | ")  
+            return ori_pred  # Fallback to original text in case of an error  
+        if cacheable:  
+            self.translate_cache.put(translate_method, ori, tar, ori_pred, translated_pred)  
+        return translated_pred  
+  
+    async def translate_multi(self, ori_pred, ori, tars):  
+        """  
+        Translate a text into several target languages concurrently.  
+  
+        The targets fan out over the pooled async clients, so three targets cost  
+        about one backend round trip instead of three serial ones.  
+  
+        :param ori_pred: str  
+            The original text to be translated.  
+        :param ori: str  
+            The original language of the text.  
+        :param tars: list  
+            The target languages.  
+        :rtype: tuple  
+            {target language: translation}, the translation time and the translation method used.  
+        """  
+        start = time.time()  
+        ori_pred = ori_pred if ori_pred != "." else ""  # Ensure the original prediction is not just a period  
+        # Snapshot the method so a concurrent change_translate_method cannot switch it mid-request  
+        translate_method = self.translate_method  
+        ollama_translator = self.ollama_translator  
+        async_ollama_translator = self.async_ollama_translator  
+        translations = await asyncio.gather(*(  
+            self._translate_one_async(translate_method, ollama_translator, async_ollama_translator, ori_pred, ori, tar) for tar in tars  
+        ))  
+        end = time.time()  
+        return dict(zip(tars, translations)), end - start, translate_method  
+  
+    async def translate_async(self, ori_pred, ori, tar):  
+        """  
+        Async counterpart of `translate` for callers on the event loop.  
+  
+        :rtype: tuple  
+            A tuple containing the translated text, the translation time, and the translation method used.  
+        """  
+        translations, translate_time, translate_method = await self.translate_multi(ori_pred, ori, [tar])  
+        return translations[tar], translate_time, translate_method  
+  
+    def translate(self, ori_pred, ori, tar, deadline=None):  
         """  
         Translate the given text from the original language to the target language.  
     
@@ -166,55 +879,40 @@ class Model:
             The original language of the text.  
         :param tar: str  
             The target language for translation.  
+        :param deadline: Deadline  
+            Optional deadline, checked before calling the translation backend.  
         :return: tuple  
             A tuple containing the translated text, the translation time, and the translation method used.  
+        :raises InferenceTimeout: If the deadline has already passed, carrying the untranslated text.  
         """  
         start = time.time()  
         ori_pred = ori_pred if ori_pred != "." else ""  # Ensure the original prediction is not just a period  
+        if deadline is not None:  
+            deadline.check("translate", ori_pred)  
+        # Snapshot the method so a concurrent change_translate_method cannot switch it mid-request  
+        translate_method = self.translate_method  
+        ollama_translator = self.ollama_translator  
     
         try:  
             if ori != tar and ori_pred != '':  # Proceed with translation only if languages are different and text is not empty  
-                if self.translate_method == "google":  
-                    # Adjust language codes for Google Translate  
-                    ori = 'zh-TW' if ori == 'zh' else ori  
-                    tar = 'zh-TW' if tar == 'zh' else tar  
-                    translated_pred = self.google_translator.translate(ori_pred, src=ori, dest=tar).text  
-                
-                elif self.translate_method == "gpt-4o":  
-                    try:  
-                        translated_pred = self.gpt4o_translator.translate(ori_pred, ori, tar)  
-                        if "403_Forbidden" in translated_pred:  
-                            logger.error(f" | gpt-4o reject translate | use google translate to retry | ")  
-                            # Retry translation using Google Translate if GPT-4o translation is forbidden  
-                            ori = 'zh-TW' if ori == 'zh' else ori  
-                            tar = 'zh-TW' if tar == 'zh' else tar  
-                            translated_pred = self.google_translator.translate(ori_pred, src=ori, dest=tar).text  
-                    except Exception as e:  
-                        logger.error(f" | gpt-4o translate error: {e} | use google translate to retry | ")  
-                        # Retry translation using Google Translate if an error occurs with GPT-4o  
-                        ori = 'zh-TW' if ori == 'zh' else ori  
-                        tar = 'zh-TW' if tar == 'zh' else tar  
-                        translated_pred = self.google_translator.translate(ori_pred, src=ori, dest=tar).text  
-                
-                # elif self.translate_method == "gemma":  
-                #     translated_pred = self.gemma_translator.translate(ori_pred, ori, tar)  
-                
-                elif self.translate_method in OLLAMA_MODEL:  
-                    translated_pred = self.ollama_translator.chat(source_text=ori_pred, source_lang=ori, target_lang=tar)  
-                
-                else:  
-                    translated_pred = ori_pred  # No translation needed if the method is not recognized  
+                translated_pred = self.translate_cache.get(translate_method, ori, tar, ori_pred)  
+                if translated_pred is None:  
+                    backend_start = time.time()  
+                    translated_pred, cacheable = self._translate_backend(translate_method, ollama_translator, ori_pred, ori, tar)  
+                    TRANSLATE_SECONDS.observe(time.time() - backend_start, method=translate_method)  
+                    if cacheable:  
+                        self.translate_cache.put(translate_method, ori, tar, ori_pred, translated_pred)  
             else:  
                 translated_pred = ori_pred  # No translation needed if languages are the same or text is empty  
         
         except Exception as e:  
             translated_pred = ori_pred  # Fallback to original text in case of an error  
-            logger.error(f" | translate() '{self.translate_method}' error: {e} | ")  
+            logger.error(f" | translate() '{translate_method}' error: {e} | ")  
     
         end = time.time()  
         g_translate_time = end - start  # Calculate the time taken for translation  
     
-        return translated_pred, g_translate_time, self.translate_method  
+        return translated_pred, g_translate_time, translate_method  
         
 if __name__ == "__main__":  
     # argos  
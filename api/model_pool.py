@@ -0,0 +1,100 @@
+import gc
+import logging
+import threading
+import torch
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class ModelPool:
+    """
+    Keep several loaded models resident within a memory budget.
+
+    Models are stored by name with their measured size. When room is needed the
+    least recently used models are released first, models named in `keep` (e.g.
+    the one currently serving traffic) are never evicted.
+    """
+    def __init__(self, budget_mb, size_hints_mb=None):
+        """
+        :param budget_mb: float
+            The memory budget of all resident models together.
+        :param size_hints_mb: dict
+            Expected size of each model before it is loaded, used to make room up front.
+        """
+        self.budget_mb = budget_mb
+        self.size_hints_mb = dict(size_hints_mb or {})
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def estimate_size_mb(model):
+        """Size of the parameters and buffers of a torch module (or a FunASR AutoModel wrapping one)."""
+        if hasattr(model, "size_mb"):
+            # Engines that keep their weights outside torch report their own size
+            return model.size_mb
+        module = model if isinstance(model, torch.nn.Module) else getattr(model, "model", None)
+        if not isinstance(module, torch.nn.Module):
+            return 0.0
+        tensors = list(module.parameters()) + list(module.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors) / (1024 ** 2)
+
+    @property
+    def used_mb(self):
+        with self._lock:
+            return sum(size for _, size in self._models.values())
+
+    def names(self):
+        """The resident model names, least recently used first."""
+        with self._lock:
+            return list(self._models)
+
+    def get(self, name):
+        """
+        :rtype: Any | None
+            The resident model (marked as most recently used), or None if it is not loaded.
+        """
+        with self._lock:
+            if name not in self._models:
+                return None
+            self._models.move_to_end(name)
+            return self._models[name][0]
+
+    def put(self, name, model):
+        """Register a freshly loaded model and remember its measured size, replacing a resident model of the same name."""
+        size = self.estimate_size_mb(model)
+        with self._lock:
+            self._models[name] = (model, size)
+            self._models.move_to_end(name)
+        self.size_hints_mb[name] = size
+        logger.info(f" | Model '{name}' is resident ({size:.0f} MB). Pool: {self.names()} {self.used_mb:.0f}/{self.budget_mb} MB | ")
+
+    def fits(self, name):
+        """Whether `name` fits next to the models that are already resident."""
+        return self.used_mb + self.size_hints_mb.get(name, 0.0) <= self.budget_mb
+
+    def make_room(self, name, keep=()):
+        """
+        Evict least recently used models until `name` fits, never touching `keep`.
+
+        :rtype: bool
+            Whether `name` fits afterwards.
+        """
+        for candidate in self.names():
+            if self.fits(name):
+                break
+            if candidate not in keep and candidate != name:
+                self.evict(candidate)
+        return self.fits(name)
+
+    def evict(self, name):
+        """Release a resident model and its memory."""
+        with self._lock:
+            item = self._models.pop(name, None)
+        if item is None:
+            return
+        del item
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        logger.info(f" | Model '{name}' has been evicted from the pool. | ")
@@ -5,7 +5,8 @@ import yaml
 from ollama import Client
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from lib.constant import LANGUAGE_LIST, SOURCE_LANGUAGE, SYSTEM_PRMOPT, USER_PRMOPT_TITLE, SAMPLE_1, SAMPLE_2, SAMPLE_3
+from lib.constant import LANGUAGE_LIST, USER_PRMOPT_TITLE
+from api.prompt_registry import PROMPT_REGISTRY, build_batch_prompt, parse_batch_reply
 
 logger = logging.getLogger(__name__)
  
@@ -69,15 +70,8 @@ class OllamaChat:
             如果 stream=False，返回完整響應
         """
         if {source_lang, target_lang}.issubset(LANGUAGE_LIST):  
-            system_prompt = SYSTEM_PRMOPT[target_lang]
-            try:
-                system_prompt = system_prompt.replace("source_language", SOURCE_LANGUAGE[LANGUAGE_LIST.index(source_lang)][LANGUAGE_LIST.index(target_lang)])  
-                system_prompt = system_prompt.replace("sample_1", SAMPLE_1[source_lang])  
-                system_prompt = system_prompt.replace("sample_2", SAMPLE_2[source_lang])  
-                system_prompt = system_prompt.replace("sample_3", SAMPLE_3[source_lang])  
-            except Exception as e:
-                logger.error(f"Error: {e}")
-            logger.debug(f" | system prompt: {system_prompt} | ")
+            system_prompt = PROMPT_REGISTRY.get(source_lang, target_lang)
+            logger.debug(f" | system prompt {PROMPT_REGISTRY.prompt_hash(source_lang, target_lang)}: {system_prompt} | ")
             
             messages = [
                 {"role": "system", "content": system_prompt},
@@ -103,6 +97,36 @@ class OllamaChat:
             logger.error(f" | Error: source_lang \"{source_lang}\" or target_lang \"{target_lang}\" not in LANGUAGE_LIST \"{LANGUAGE_LIST}\" | ")
             return source_text
         
+    def chat_batch(self, source_texts, source_lang="zh", target_lang="en", temperature=0.0):
+        """
+        Translate several segments of one language pair in a single request (numbered-list prompt).
+
+        :rtype: list | None
+            One translation per segment, or None if the request failed or the reply could not be split.
+        """
+        if not {source_lang, target_lang}.issubset(LANGUAGE_LIST):
+            logger.error(f" | Error: source_lang \"{source_lang}\" or target_lang \"{target_lang}\" not in LANGUAGE_LIST \"{LANGUAGE_LIST}\" | ")
+            return None
+        messages = [
+            {"role": "system", "content": PROMPT_REGISTRY.get(source_lang, target_lang)},
+            {"role": "user", "content": build_batch_prompt(source_texts)},
+        ]
+        try:
+            response = self.client.chat(
+                model=self.config["MODEL"],
+                messages=messages,
+                options={"temperature": temperature},
+                stream=False,
+                keep_alive=-1
+            )
+        except Exception as e:
+            logger.error(f" | ollama batch Error: {e} | ")
+            return None
+        translations = parse_batch_reply(response.message.content, len(source_texts))
+        if translations is None:
+            return None
+        return [self.get_translated_text(target_lang, text) for text in translations]
+
     def close(self):
         self.client.chat(
             model=self.config["MODEL"],
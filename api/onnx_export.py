@@ -0,0 +1,48 @@
+"""
+Export SenseVoiceSmall and ct-punc to ONNX for the sensevoice_onnx model variant.
+
+Writes model.onnx (and model_quant.onnx with --quantize) next to the FunASR
+weights, where `OnnxSenseVoice` / `OnnxPunc` load them from. Run once on a box
+with the full FunASR stack; replicas then only need onnxruntime and funasr-onnx.
+
+    python api/onnx_export.py --quantize
+"""
+import os
+import sys
+import argparse
+import logging
+from funasr import AutoModel
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from lib.constant import ONNX_PARAMETER
+
+logger = logging.getLogger(__name__)
+
+
+def export_onnx(model_dir, quantize=True):
+    """
+    :param model_dir: str
+        The FunASR model directory.
+    :param quantize: bool
+        Also write the int8-quantized graph.
+    :rtype: str
+        The directory the ONNX files were written to.
+    """
+    model = AutoModel(model=model_dir, disable_update=True, disable_pbar=True, device="cpu")
+    export_dir = model.export(type="onnx", quantize=quantize)
+    logger.info(f" | Model '{model_dir}' exported to ONNX in '{export_dir}'. | ")
+    return export_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export SenseVoiceSmall and ct-punc to ONNX.")
+    parser.add_argument("--models", nargs="+", default=[ONNX_PARAMETER["sensevoice"], ONNX_PARAMETER["punc"]])
+    parser.add_argument("--quantize", action="store_true", help="also write the int8-quantized model_quant.onnx")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    for model_dir in args.models:
+        print(export_onnx(model_dir, args.quantize))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import os
+import re
+import logging
+from funasr_onnx import SenseVoiceSmall, CT_Transformer
+
+logger = logging.getLogger(__name__)
+
+# Leading SenseVoice tags, e.g. "<|en|><|NEUTRAL|><|Speech|><|withitn|>"
+_TAGS = re.compile(r'^((?:<\|[^|]*\|>)*)(.*)$', re.S)
+
+
+def _onnx_size_mb(model_dir, quantize):
+    path = os.path.join(model_dir, "model_quant.onnx" if quantize else "model.onnx")
+    return os.path.getsize(path) / (1024 ** 2) if os.path.exists(path) else 0.0
+
+
+class OnnxSenseVoice:
+    """
+    SenseVoiceSmall on ONNX Runtime with the `AutoModel.generate` interface.
+
+    Returns the same tagged texts as the FunASR model, so the results go through
+    `extract_sensevoice_result_text` unchanged. `ban_emo_unk` is not supported by the
+    exported graph; the emotion tag is dropped by the text extraction anyway.
+    """
+    def __init__(self, model_dir, quantize=True, intra_op_num_threads=4, device_id="-1"):
+        """
+        :param model_dir: str
+            The SenseVoiceSmall directory holding model.onnx / model_quant.onnx (see api/onnx_export.py).
+        :param quantize: bool
+            Use the int8-quantized graph.
+        """
+        self.model = SenseVoiceSmall(model_dir, batch_size=1, device_id=device_id, quantize=quantize,
+                                     intra_op_num_threads=intra_op_num_threads)
+        self.size_mb = _onnx_size_mb(model_dir, quantize)
+
+    def generate(self, input, language="auto", itn=True, ban_emo_unk=False, **kwargs):
+        """
+        :param input: np.ndarray | list
+            One 16 kHz waveform or a list of them.
+        :rtype: list
+            [{"text": ...}] per waveform, like `AutoModel.generate`.
+        """
+        audios = input if isinstance(input, list) else [input]
+        language = language if language in self.model.lid_dict else "auto"
+        textnorm = "withitn" if itn else "woitn"
+        # funasr_onnx reads lists as file paths, so the clips go through one at a time
+        return [{"text": self.model(audio, language=language, textnorm=textnorm)[0]} for audio in audios]
+
+
+class OnnxPunc:
+    """
+    ct-punc on ONNX Runtime with the `AutoModel.generate` interface.
+
+    SenseVoice tags in front of a text are kept aside and put back after
+    punctuation, so `extract_sensevoice_result_text` finds the same text.
+    """
+    def __init__(self, model_dir, quantize=True, intra_op_num_threads=4, device_id="-1"):
+        self.model = CT_Transformer(model_dir, batch_size=1, device_id=device_id, quantize=quantize,
+                                    intra_op_num_threads=intra_op_num_threads)
+        self.size_mb = _onnx_size_mb(model_dir, quantize)
+
+    def generate(self, input, **kwargs):
+        """
+        :param input: str | list
+        :rtype: list
+            [{"text": ...}] per text, like `AutoModel.generate`.
+        """
+        results = []
+        for text in (input if isinstance(input, list) else [input]):
+            tags, content = _TAGS.match(text).groups()
+            results.append({"text": tags + self.model(content)[0] if content.strip() else text})
+        return results
@@ -0,0 +1,89 @@
+import os
+import re
+import sys
+import hashlib
+import logging
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from lib.constant import LANGUAGE_LIST, SOURCE_LANGUAGE, SYSTEM_PRMOPT, SAMPLE_1, SAMPLE_2, SAMPLE_3, BATCH_TRANSLATE_INSTRUCTION
+
+logger = logging.getLogger(__name__)
+
+
+class PromptRegistry:
+    """
+    Every (source, target) system prompt of the LLM translators, built once at startup.
+
+    Translators take their system prompt from here instead of formatting it per call:
+    the prompts are byte-identical across calls, so LLM servers that cache the KV
+    state of a shared prefix (e.g. ollama) can reuse it. `prompt_hash` gives a stable
+    identifier of each prompt, logged with the LLM calls.
+    """
+    def __init__(self):
+        self._prompts = {}
+        self._hashes = {}
+        for source_lang in LANGUAGE_LIST:
+            for target_lang in LANGUAGE_LIST:
+                prompt = self._build(source_lang, target_lang)
+                self._prompts[(source_lang, target_lang)] = prompt
+                self._hashes[(source_lang, target_lang)] = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _build(source_lang, target_lang):
+        """Fill the system prompt template of `target_lang` for `source_lang`."""
+        system_prompt = SYSTEM_PRMOPT[target_lang]
+        system_prompt = system_prompt.replace("source_language", SOURCE_LANGUAGE[LANGUAGE_LIST.index(source_lang)][LANGUAGE_LIST.index(target_lang)])
+        system_prompt = system_prompt.replace("sample_1", SAMPLE_1[source_lang])
+        system_prompt = system_prompt.replace("sample_2", SAMPLE_2[source_lang])
+        system_prompt = system_prompt.replace("sample_3", SAMPLE_3[source_lang])
+        return system_prompt
+
+    def get(self, source_lang, target_lang):
+        """
+        :rtype: str | None
+            The system prompt, or None if either language is not in LANGUAGE_LIST.
+        """
+        return self._prompts.get((source_lang, target_lang))
+
+    def prompt_hash(self, source_lang, target_lang):
+        """
+        :rtype: str | None
+            A stable hash of the system prompt, or None if either language is not supported.
+        """
+        return self._hashes.get((source_lang, target_lang))
+
+
+_NUMBERED_LINE = re.compile(r"^\s*(\d+)\s*[.)、:]\s?(.*)$")
+
+
+def build_batch_prompt(texts):
+    """
+    The user message translating several segments in one LLM call.
+
+    :param texts: list
+        The segments, each on its own numbered line (newlines inside a segment are flattened).
+    :rtype: str
+    """
+    lines = "\n".join(f"{index}. {' '.join(text.split())}" for index, text in enumerate(texts, 1))
+    return f"{BATCH_TRANSLATE_INSTRUCTION.format(count=len(texts))}\n{lines}"
+
+
+def parse_batch_reply(reply, count):
+    """
+    Split the numbered-list reply of a batch prompt.
+
+    :rtype: list | None
+        One translation per segment, or None if the reply does not number exactly `count` lines.
+    """
+    translations = {}
+    for line in reply.splitlines():
+        match = _NUMBERED_LINE.match(line)
+        if match:
+            translations[int(match.group(1))] = match.group(2).strip()
+    if sorted(translations) != list(range(1, count + 1)):
+        return None
+    return [translations[index] for index in range(1, count + 1)]
+
+
+# Shared by every translator
+PROMPT_REGISTRY = PromptRegistry()
@@ -0,0 +1,77 @@
+import math
+import dataclasses
+import torch
+import whisper
+import torch.nn.functional as F
+
+from lib.constant import SAMPLE_RATE, SHORT_CLIP
+
+
+def short_clip_samples(longest):
+    """
+    Samples of the reduced window a clip of `longest` samples is padded to.
+
+    The clip plus `SHORT_CLIP["padding_seconds"]` is rounded up to whole seconds,
+    which keeps the mel length even (the encoder halves it) and the number of
+    distinct shapes small. Never longer than whisper's 30 s window.
+    """
+    seconds = math.ceil(longest / SAMPLE_RATE + SHORT_CLIP["padding_seconds"])
+    return min(seconds * SAMPLE_RATE, whisper.audio.N_SAMPLES)
+
+
+class ShortClipWhisper:
+    """
+    View of a Whisper model whose encoder runs over a mel shorter than 30 s.
+
+    The positional embedding is sliced to the encoded length, so a 3 s clip costs
+    the encoder a few hundred positions instead of 1500, and the decoder
+    cross-attends over the shorter output. `whisper.decode` calls `model.encoder`
+    on the mel it is given; everything else is delegated to the real model.
+    `dims.n_audio_ctx` is the reduced length so language detection recognises the
+    encoded features. Only timestamp-free decoding is supported.
+    """
+    def __init__(self, model, n_frames):
+        """
+        :param n_frames: int
+            Mel frames of the reduced window (see `short_clip_samples`).
+        """
+        self._model = model
+        self.dims = dataclasses.replace(model.dims, n_audio_ctx=n_frames // 2)
+
+    def encoder(self, mel):
+        """
+        :param mel: torch.Tensor
+            (batch, n_mels, n_frames) log-mel spectrogram, n_frames even and at most 3000.
+        :rtype: torch.Tensor
+            (batch, n_frames // 2, n_audio_state) audio features.
+        """
+        encoder = self._model.encoder
+        x = F.gelu(encoder.conv1(mel))
+        x = F.gelu(encoder.conv2(x))
+        x = x.permute(0, 2, 1)
+        x = (x + encoder.positional_embedding[:x.shape[1]]).to(x.dtype)
+        for block in encoder.blocks:
+            x = block(x)
+        return encoder.ln_post(x)
+
+    def detect_language(self, mel, tokenizer=None):
+        # Bound to the view, so the reduced `dims` and `encoder` apply
+        return whisper.decoding.detect_language(self, mel, tokenizer)
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+def short_clip_mel(audios, n_mels, device):
+    """
+    Stack the log-mel spectrograms of `audios`, padded to the reduced window of the longest one.
+
+    :param audios: list
+        float32 16 kHz waveforms.
+    :rtype: torch.Tensor
+    """
+    length = short_clip_samples(max(len(audio) for audio in audios))
+    return torch.stack([
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(audio), length), n_mels)
+        for audio in audios
+    ]).to(device)
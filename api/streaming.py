@@ -0,0 +1,172 @@
+import re
+import logging
+import numpy as np
+from collections import deque
+
+from lib.constant import SAMPLE_RATE, STREAM_PARAMETER
+
+logger = logging.getLogger(__name__)
+
+# CJK characters are compared one by one, everything else word by word
+_CJK = "぀-ヿ㐀-鿿가-힯"
+_TOKEN = re.compile(rf"\s*(?:[{_CJK}]|[^\s{_CJK}]+)")
+_PUNCTUATION = ".,!?;:\"'()[]-，。！？、；：「」『』（）"
+
+
+def tokenize(text):
+    """Split a hypothesis into tokens that keep their leading whitespace, so `"".join` restores the text."""
+    return _TOKEN.findall(text)
+
+
+def _join(a, b):
+    """Join two texts with a space, unless either side of the seam is CJK."""
+    if not a or not b:
+        return a + b
+    if re.match(rf"[{_CJK}]", a[-1]) or re.match(rf"[{_CJK}]", b[0]):
+        return a + b
+    return a + " " + b
+
+
+def _same(a, b):
+    """Whether two tokens agree, ignoring case, spacing and surrounding punctuation."""
+    return a.strip().strip(_PUNCTUATION).lower() == b.strip().strip(_PUNCTUATION).lower()
+
+
+class LocalAgreement:
+    """
+    Committed-prefix stabilisation of successive hypotheses of the same audio.
+
+    A token is committed once the last `n` hypotheses agree on it (LocalAgreement-n).
+    Committed tokens never change; the rest of the newest hypothesis is the
+    unstable tail that may still be revised by the next decode.
+    """
+    def __init__(self, n=STREAM_PARAMETER["agreement"]):
+        self.history = deque(maxlen=n)
+        self.committed = []
+
+    def update(self, text):
+        """
+        Add a new hypothesis.
+
+        :param text: str
+            The transcription of the whole current segment.
+        :rtype: tuple
+            (committed text, unstable text)
+        """
+        tokens = tokenize(text)
+        self.history.append(tokens)
+        if len(self.history) == self.history.maxlen:
+            agreed = 0
+            for column in zip(*self.history):
+                if not all(_same(column[0], token) for token in column[1:]):
+                    break
+                agreed += 1
+            if agreed > len(self.committed):
+                self.committed = self.committed + tokens[len(self.committed):agreed]
+
+        # The committed prefix is frozen, only the part after it comes from the new hypothesis
+        return "".join(self.committed).strip(), "".join(tokens[len(self.committed):])
+
+    def reset(self):
+        self.history.clear()
+        self.committed = []
+
+
+class StreamingSession:
+    """
+    Rolling audio buffer and hypothesis state of one streamed utterance (`audio_uid`).
+
+    PCM frames are appended as they arrive. Only the open segment is decoded: once
+    it ends in a pause (or reaches `max_segment_s`) it is finalized and its audio is
+    dropped, so every decode covers at most one segment instead of the whole stream.
+    Within the segment, once a window is fully committed and ends in a short pause,
+    its audio is not decoded again: later windows start after it (`offset`) and get
+    its text (`prefix`) as the initial prompt.
+    """
+    def __init__(self, request, vad, step_ms=STREAM_PARAMETER["step_ms"],
+                 endpoint_ms=STREAM_PARAMETER["endpoint_ms"], max_segment_s=STREAM_PARAMETER["max_segment_s"],
+                 cut_ms=STREAM_PARAMETER["cut_ms"]):
+        """
+        :param request: StreamingData
+            The first frame header of the stream (ids and languages).
+        :param vad: EnergyVAD
+            Used to detect the pause that ends a segment.
+        """
+        self.request = request
+        self.vad = vad
+        self.step = int(SAMPLE_RATE * step_ms / 1000)
+        self.endpoint = endpoint_ms / 1000.0
+        self.max_segment = int(SAMPLE_RATE * max_segment_s)
+        self.cut = cut_ms / 1000.0
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.decoded = 0
+        self.offset = 0          # samples of the segment that are committed and not decoded again
+        self.prefix = ""         # committed text of those samples
+        self._previous = None    # (window end, tokens, ends in a pause) of the last hypothesis
+        self.segment_id = 0
+        self.closing = False
+        self.agreement = LocalAgreement()
+
+    def append(self, audio):
+        """Append decoded PCM to the open segment."""
+        self.buffer = np.concatenate([self.buffer, audio.astype(np.float32, copy=False)])
+
+    def close(self):
+        """The client finished the stream, the open segment is finalized on the next decode."""
+        self.closing = True
+
+    def ready(self):
+        """Whether enough new audio arrived for another decode."""
+        return len(self.buffer) - self.decoded >= self.step or (self.closing and len(self.buffer) > 0)
+
+    def window(self):
+        """The audio of the open segment after the committed offset, marked as decoded."""
+        self.decoded = len(self.buffer)
+        return self.buffer[self.offset:]
+
+    def update(self, text, audio):
+        """
+        Apply the hypothesis of a decoded window.
+
+        :param text: str
+            The transcription of `audio`.
+        :param audio: np.ndarray
+            The window returned by `window()`.
+        :rtype: dict
+            The event: "partial" with committed and unstable text, or "final" with the
+            text of the finished segment.
+        """
+        committed, unstable = self.agreement.update(text)
+        committed = _join(self.prefix, committed)
+        trailing_silence = self.vad.trailing_silence(audio)
+        is_final = (self.closing and self.decoded == len(self.buffer)) or self.decoded >= self.max_segment \
+            or (bool(committed or unstable.strip()) and trailing_silence >= self.endpoint)
+        event = {
+            "event": "final" if is_final else "partial",
+            "segment_id": self.segment_id,
+            "committed_text": committed,
+            "unstable_text": unstable,
+            "text": _join(committed, unstable.strip()),
+        }
+        if is_final:
+            # Keep only the audio that arrived after the decoded window
+            self.buffer = self.buffer[self.decoded:]
+            self.decoded = 0
+            self.offset, self.prefix, self._previous = 0, "", None
+            self.segment_id += 1
+            self.agreement.reset()
+            return event
+
+        previous, self._previous = self._previous, (self.decoded, len(tokenize(text)), trailing_silence >= self.cut)
+        if previous is not None and previous[1] and previous[2] and len(self.agreement.committed) >= previous[1]:
+            # The previous window is fully committed and ends in a pause, decode only after it from now on
+            self.offset = previous[0]
+            self.prefix = committed
+            self.agreement.reset()
+            self._previous = None
+        elif not text.strip() and not self.prefix:
+            # Nothing said yet, keep only a short lead-in instead of decoding the silence again
+            cut = max(0, len(audio) - int(SAMPLE_RATE * self.endpoint))
+            self.buffer = self.buffer[cut:]
+            self.decoded -= cut
+        return event
@@ -0,0 +1,71 @@
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _StubResult:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubGoogleTranslator:
+    """Offline stand-in for `googletrans.Translator`, for benchmarks and load tests."""
+    def __init__(self, latency=0.0):
+        """
+        :param latency: float
+            Seconds every call sleeps, to simulate the network round trip.
+        """
+        self.latency = latency
+
+    def translate(self, text, src="auto", dest="en"):
+        time.sleep(self.latency)
+        return _StubResult(f"[{src}->{dest}] {text}")
+
+
+class StubChatTranslator:
+    """Offline stand-in for `OllamaChat`."""
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def chat(self, temperature=0.0, stream=False, format="", source_text="", source_lang="zh", target_lang="en"):
+        time.sleep(self.latency)
+        return f"[{source_lang}->{target_lang}] {source_text}"
+
+    def chat_batch(self, source_texts, source_lang="zh", target_lang="en", temperature=0.0):
+        time.sleep(self.latency)
+        return [f"[{source_lang}->{target_lang}] {text}" for text in source_texts]
+
+    def close(self):
+        logger.info(f" | Stub chat translator closed. | ")
+
+
+class StubGptTranslator:
+    """Offline stand-in for `Gpt4oTranslate`."""
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def translate(self, source_text, source_lang, target_lang):
+        time.sleep(self.latency)
+        return f"[{source_lang}->{target_lang}] {source_text}"
+
+    def translate_batch(self, source_texts, source_lang, target_lang):
+        time.sleep(self.latency)
+        return [f"[{source_lang}->{target_lang}] {text}" for text in source_texts]
+
+
+class StubASR:
+    """
+    Deterministic stand-in for a Whisper model, for load tests without a GPU.
+
+    `transcribe` sleeps `rtf` seconds per second of audio and returns a fixed text
+    derived from the clip length, like `whisper.transcribe` returns a dict.
+    """
+    def __init__(self, rtf=0.05, sample_rate=16000):
+        self.rtf = rtf
+        self.sample_rate = sample_rate
+
+    def transcribe(self, audio, **options):
+        seconds = len(audio) / self.sample_rate
+        time.sleep(seconds * self.rtf)
+        return {"text": f"stub transcription of {seconds:.2f} seconds of audio", "segments": [], "language": options.get("language")}
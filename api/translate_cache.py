@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationCache:
+    """
+    Bounded LRU + TTL cache of translations.
+
+    Entries are keyed on (translate method, source language, target language,
+    normalized source text). It is thread-safe, keeps hit / miss counters and can
+    be persisted to a JSON file so it survives restarts. A changed cache is saved
+    every `save_interval` seconds (see `maybe_save`) and on shutdown, so a crash
+    loses at most the entries of the last interval.
+    """
+    def __init__(self, max_size, ttl, persist_path=None, save_interval=300):
+        """
+        :param max_size: int
+            The maximum number of entries, the least recently used are evicted first.
+        :param ttl: float
+            Seconds an entry stays valid.
+        :param persist_path: str
+            Optional JSON file the cache is loaded from and saved to.
+        :param save_interval: float
+            Minimum seconds between two saves by `maybe_save`.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self.save_interval = save_interval
+        self._changed = False
+        self._saved_at = time.monotonic()
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if persist_path:
+            self.load()
+
+    @staticmethod
+    def normalize(text):
+        """Normalize unicode forms and collapse whitespace so trivially different inputs share an entry."""
+        return " ".join(unicodedata.normalize("NFKC", text).split())
+
+    def _key(self, method, ori, tar, text):
+        return (method, ori, tar, self.normalize(text))
+
+    def get(self, method, ori, tar, text):
+        """
+        Look up a translation.
+
+        :rtype: str | None
+            The cached translation, or None on a miss.
+        """
+        key = self._key(method, ori, tar, text)
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[1] > time.time():
+                self._items.move_to_end(key)
+                self.hits += 1
+                return item[0]
+            if item is not None:
+                del self._items[key]
+            self.misses += 1
+            return None
+
+    def put(self, method, ori, tar, text, translation):
+        """Store a translation, evicting the least recently used entry when full."""
+        key = self._key(method, ori, tar, text)
+        with self._lock:
+            self._items[key] = (translation, time.time() + self.ttl)
+            self._items.move_to_end(key)
+            self._changed = True
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def stats(self):
+        """Hit / miss counters and the current size."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._items),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def load(self):
+        """Load unexpired entries from `persist_path`, if it exists."""
+        if self.max_size <= 0 or not os.path.exists(self.persist_path):
+            # A cache of size 0 is disabled, `entries[-0:]` would load the whole file
+            return
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except Exception as e:
+            logger.error(f" | load translate cache error: {e} | ")
+            return
+        now = time.time()
+        with self._lock:
+            for method, ori, tar, text, translation, expires_at in entries[-self.max_size:]:
+                if expires_at > now:
+                    self._items[(method, ori, tar, text)] = (translation, expires_at)
+        logger.info(f" | Translate cache loaded {len(self._items)} entries from {self.persist_path}. | ")
+
+    def save(self):
+        """Write the cache to `persist_path` (LRU order, atomically replaced)."""
+        if not self.persist_path:
+            return
+        with self._lock:
+            entries = [[*key, translation, expires_at] for key, (translation, expires_at) in self._items.items()]
+            self._changed = False
+            self._saved_at = time.monotonic()
+        directory = os.path.dirname(self.persist_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.persist_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.persist_path)
+        logger.info(f" | Translate cache saved {len(entries)} entries to {self.persist_path}. | ")
+
+    def maybe_save(self):
+        """Save the cache if it changed and `save_interval` seconds passed since the last save."""
+        with self._lock:
+            due = self.persist_path and self._changed and time.monotonic() - self._saved_at >= self.save_interval
+        if due:
+            try:
+                self.save()
+            except Exception as e:
+                logger.error(f" | save translate cache error: {e} | ")
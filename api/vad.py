@@ -0,0 +1,91 @@
+import logging
+import threading
+import numpy as np
+
+from lib.constant import SAMPLE_RATE, VAD_PARAMETER
+
+logger = logging.getLogger(__name__)
+
+
+class EnergyVAD:
+    """
+    Cheap energy / zero-crossing voice-activity detector.
+
+    A frame counts as speech when its energy is above an absolute floor and either
+    clearly loud or above the clip's own noise floor plus a margin, unless it is
+    noise-like (very high zero-crossing rate with energy close to the noise floor).
+    Clips with too little speech are reported as silent, the rest get their leading
+    and trailing silence trimmed.
+    """
+    def __init__(self, frame_ms=VAD_PARAMETER["frame_ms"], min_energy_db=VAD_PARAMETER["min_energy_db"],
+                 margin_db=VAD_PARAMETER["margin_db"], speech_energy_db=VAD_PARAMETER["speech_energy_db"],
+                 max_zcr=VAD_PARAMETER["max_zcr"], min_speech_ms=VAD_PARAMETER["min_speech_ms"],
+                 padding_ms=VAD_PARAMETER["padding_ms"]):
+        self.frame = int(SAMPLE_RATE * frame_ms / 1000)
+        self.min_energy_db = min_energy_db
+        self.margin_db = margin_db
+        self.speech_energy_db = speech_energy_db
+        self.max_zcr = max_zcr
+        self.min_speech_frames = max(1, int(min_speech_ms / frame_ms))
+        self.padding = int(SAMPLE_RATE * padding_ms / 1000)
+        self._lock = threading.Lock()
+        self.total = 0
+        self.skipped = 0
+
+    @property
+    def skip_rate(self):
+        """The share of counted clips skipped as silent since startup."""
+        with self._lock:
+            return self.skipped / self.total if self.total else 0.0
+
+    def _speech_frames(self, audio):
+        """Return a boolean speech mask, one entry per frame."""
+        n_frames = len(audio) // self.frame
+        frames = audio[: n_frames * self.frame].reshape(n_frames, self.frame)
+        energy_db = 10.0 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+        zcr = np.mean(np.abs(np.diff(np.signbit(frames), axis=1)), axis=1)
+        noise_floor = np.percentile(energy_db, 10)
+        loud = (energy_db > self.min_energy_db) & ((energy_db > noise_floor + self.margin_db) | (energy_db > self.speech_energy_db))
+        noise_like = (zcr > self.max_zcr) & (energy_db < noise_floor + 2 * self.margin_db)
+        return loud & ~noise_like
+
+    def trim(self, audio, count=True):
+        """
+        Drop silent clips and trim leading / trailing silence from the rest.
+
+        :param audio: np.ndarray
+            The float32 16 kHz waveform.
+        :param count: bool
+            Count the clip in `skip_rate`. Streaming windows are decoded repeatedly and are not counted.
+        :rtype: np.ndarray | None
+            The trimmed waveform, or None if the clip has no speech.
+        """
+        speech = self._speech_frames(audio) if len(audio) >= self.frame else np.zeros(0, dtype=bool)
+        is_silent = int(speech.sum()) < self.min_speech_frames
+        if count:
+            with self._lock:
+                self.total += 1
+                self.skipped += int(is_silent)
+        if is_silent:
+            return None
+
+        index = np.flatnonzero(speech)
+        start = max(0, index[0] * self.frame - self.padding)
+        end = min(len(audio), (index[-1] + 1) * self.frame + self.padding)
+        return audio[start:end]
+
+    def trailing_silence(self, audio):
+        """
+        Length of the silence at the end of a clip (used for streaming endpointing, not counted in `skip_rate`).
+
+        :param audio: np.ndarray
+            The float32 16 kHz waveform.
+        :rtype: float
+            Seconds of non-speech after the last speech frame (the whole clip if it has no speech).
+        """
+        if len(audio) < self.frame:
+            return len(audio) / SAMPLE_RATE
+        speech = self._speech_frames(audio)
+        index = np.flatnonzero(speech)
+        last = index[-1] + 1 if len(index) else 0
+        return (len(audio) - last * self.frame) / SAMPLE_RATE
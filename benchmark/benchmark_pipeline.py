@@ -0,0 +1,219 @@
+"""
+Offline benchmark of the Model transcribe / translate pipeline.
+
+Drives `transcribe_and_translate` (the job every endpoint runs) with stub
+translators over clips of several lengths and several concurrency levels, and
+writes a JSON report with p50 / p95 / p99 latency, throughput, RTF, translation
+cache hits / misses and peak RSS. `--no-translate-cache` sends every translation
+to the (stub) backend instead of answering repeats from the cache.
+The default `tiny` Whisper model runs on a CPU-only box.
+
+    python benchmark/benchmark_pipeline.py --model tiny --clip-seconds 2 5 10 20 --concurrency 1 4 8 --output benchmark/report.json
+
+`--short-clip-check` also transcribes every clip up to SHORT_CLIP["max_seconds"]
+with and without the short-clip encoder mode and reports the speedup and the word
+error rate of the short-clip text against the full 30 s window. A model should only
+be added to SHORT_CLIP_MODELS when the check reports `"enable": true`.
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import subprocess
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+os.chdir(ROOT)
+os.makedirs("logs", exist_ok=True)
+
+import torch
+from api.model import Model
+from api.audio_utils import load_audio_file
+from api.streaming import tokenize
+from api.threading_api import transcribe_and_translate
+from lib.constant import SAMPLE_RATE, SHORT_CLIP
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (ru_maxrss is KiB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_clip(source, seconds):
+    """Tile the source speech up to `seconds` so every length has real speech in it."""
+    length = int(seconds * SAMPLE_RATE)
+    repeats = int(np.ceil(length / len(source)))
+    return np.tile(source, repeats)[:length].astype(np.float32)
+
+
+def run_case(model, clip, concurrency, requests, ori, tar):
+    """Run `requests` jobs over `concurrency` threads and summarise them."""
+    latencies = []
+    inference_times = []
+
+    def job(_):
+        start = time.perf_counter()
+        _, _, inference_time, _, _ = transcribe_and_translate(model, clip, ori, tar)
+        latencies.append(time.perf_counter() - start)
+        inference_times.append(inference_time)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(job, range(requests)))
+    wall = time.perf_counter() - start
+
+    clip_seconds = len(clip) / SAMPLE_RATE
+    return {
+        "clip_seconds": clip_seconds,
+        "concurrency": concurrency,
+        "requests": requests,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "mean": float(np.mean(latencies)),
+        "throughput_rps": requests / wall,
+        "audio_seconds_per_second": requests * clip_seconds / wall,
+        "rtf": float(np.mean(inference_times)) / clip_seconds,
+        "translate_cache_hits": model.translate_cache.hits,
+        "translate_cache_misses": model.translate_cache.misses,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def words(text):
+    """Case- and punctuation-insensitive tokens (CJK characters count as words)."""
+    return [token for token in (re.sub(r"[^\w]", "", token).lower() for token in tokenize(text)) if token]
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level edit distance of `hypothesis` against `reference`, divided by the reference length."""
+    reference, hypothesis = words(reference), words(hypothesis)
+    if not reference:
+        return float(bool(hypothesis))
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref in enumerate(reference, 1):
+        current = [i]
+        for j, hyp in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref != hyp)))
+        previous = current
+    return previous[-1] / len(reference)
+
+
+def short_clip_check(model, source, clip_seconds, rounds, ori):
+    """Transcribe every short clip with the full 30 s window and in short-clip mode, and compare them."""
+    base = model.decode_options(ori)
+    results = []
+    for seconds in clip_seconds:
+        if seconds > SHORT_CLIP["max_seconds"]:
+            continue
+        clip = make_clip(source, seconds)
+        result = {"clip_seconds": seconds}
+        texts = {}
+        for mode, short_clip in (("full", False), ("short", True)):
+            options = base.model_copy(update={"short_clip": short_clip})
+            latencies = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                texts[mode], _ = model.transcribe(clip, ori, options=options)
+                latencies.append(time.perf_counter() - start)
+            result[mode] = {"p50": percentile(latencies, 50), "mean": float(np.mean(latencies)), "text": texts[mode]}
+        result["speedup"] = result["full"]["mean"] / result["short"]["mean"]
+        result["wer"] = word_error_rate(texts["full"], texts["short"])
+        results.append(result)
+        print(f"short clip {seconds:>5.1f}s full {result['full']['mean']:.3f}s short {result['short']['mean']:.3f}s "
+              f"speedup {result['speedup']:.2f}x wer {result['wer']:.3f}", file=sys.stderr)
+
+    wer = float(np.mean([result["wer"] for result in results])) if results else None
+    return {
+        "max_wer": SHORT_CLIP["max_wer"],
+        "wer": wer,
+        "enable": wer is not None and wer <= SHORT_CLIP["max_wer"],
+        "results": results,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the transcribe / translate pipeline.")
+    parser.add_argument("--model", default="tiny", help="ASR model name (see ModlePath)")
+    parser.add_argument("--audio", default="audio/test.wav", help="speech the clips are built from")
+    parser.add_argument("--clip-seconds", type=float, nargs="+", default=[2, 5, 10, 20])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--requests", type=int, default=16, help="requests per case")
+    parser.add_argument("--ori", default="en")
+    parser.add_argument("--tar", default="zh")
+    parser.add_argument("--translate-method", default="google", help="stubbed backend the jobs go through")
+    parser.add_argument("--translate-latency", type=float, default=0.0, help="seconds every stub translation sleeps")
+    parser.add_argument("--no-translate-cache", action="store_true", help="send every translation to the backend")
+    parser.add_argument("--short-clip-check", action="store_true", help="compare short-clip encoder mode with the full window")
+    parser.add_argument("--short-clip-rounds", type=int, default=3, help="transcriptions per clip and mode in the check")
+    parser.add_argument("--output", default=None, help="write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    model = Model(stub_translators=True, stub_latency=args.translate_latency)
+    model.change_translate_method(args.translate_method)
+    load_start = time.perf_counter()
+    model.load_model(args.model)
+    load_seconds = time.perf_counter() - load_start
+    if model.model_version != args.model:
+        sys.exit(f"model '{args.model}' could not be loaded: {model.load_error}")
+
+    source = load_audio_file(args.audio)
+    results = []
+    for seconds in args.clip_seconds:
+        clip = make_clip(source, seconds)
+        for concurrency in args.concurrency:
+            # Every request of a case transcribes the same clip, so with the cache only the first
+            # translation reaches the backend; the hit / miss counts are in the report.
+            # Each case starts with an empty cache, a size of 0 keeps nothing.
+            max_size = 0 if args.no_translate_cache else model.translate_cache.max_size
+            model.translate_cache = type(model.translate_cache)(max_size, model.translate_cache.ttl)
+            result = run_case(model, clip, concurrency, args.requests, args.ori, args.tar)
+            results.append(result)
+            print(f"clip {seconds:>5.1f}s x{concurrency:<3d} p50 {result['p50']:.3f}s p95 {result['p95']:.3f}s "
+                  f"p99 {result['p99']:.3f}s {result['throughput_rps']:.2f} req/s rtf {result['rtf']:.3f}", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "model": args.model,
+            "device": model.device,
+            "load_seconds": load_seconds,
+            "translate_method": args.translate_method,
+            "translate_latency": args.translate_latency,
+            "translate_cache": not args.no_translate_cache,
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "threads": torch.get_num_threads(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.short_clip_check:
+        report["short_clip"] = short_clip_check(model, source, args.clip_seconds, args.short_clip_rounds, args.ori)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    model.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+End-to-end load generator for a running main.py.
+
+Replays meeting traffic: every device produces clips at a Poisson arrival rate,
+re-sends each `audio_uid` a few times with a growing clip (like the meeting
+clients do while someone is talking), and sends them through one of
+
+    rtt  POST /rtt_translate/v2 (latency = request round trip)
+    sse  POST /sse_rtt_translate/v2, results read from GET /sse_rtt_translate
+    ws   /ws/rtt_translate, one connection per device
+
+Server queue depth is sampled from /get_queue_status over the run. The report
+(JSON) has the end-to-end latency distribution and ok / failed / rejected (429) /
+timeout / unanswered counts per mode. To run without a GPU or network, start the
+server with deterministic stubs:
+
+    STUB_ASR=1 STUB_TRANSLATORS=1 python main.py
+    python benchmark/load_generator.py --server http://127.0.0.1:80 --mode rtt sse ws --devices 20 --rate 0.5 --duration 60
+"""
+import io
+import os
+import re
+import sys
+import json
+import time
+import wave
+import random
+import asyncio
+import argparse
+import datetime
+import numpy as np
+import httpx
+import websockets
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from api.audio_utils import load_audio_file
+from lib.constant import SAMPLE_RATE
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+class Stats:
+    """Latencies and outcome counts of one mode."""
+    def __init__(self):
+        self.latencies = []
+        self.counts = {"sent": 0, "ok": 0, "failed": 0, "rejected": 0, "timeout": 0, "error": 0}
+
+    def record(self, outcome, latency=None):
+        self.counts[outcome] += 1
+        if outcome == "ok" and latency is not None:
+            self.latencies.append(latency)
+
+    def report(self, unanswered=0):
+        return {
+            **self.counts,
+            "unanswered": unanswered,
+            "p50": percentile(self.latencies, 50),
+            "p95": percentile(self.latencies, 95),
+            "p99": percentile(self.latencies, 99),
+            "max": max(self.latencies, default=0.0),
+            "mean": float(np.mean(self.latencies)) if self.latencies else 0.0,
+        }
+
+
+def classify(body):
+    """Map a BaseResponse body to an outcome (timeouts still carry the transcription message)."""
+    if body.get("status") == "OK":
+        return "ok"
+    return "timeout" if body.get("message", "").startswith(" | transcription:") else "failed"
+
+
+def wav_bytes(audio):
+    """Encode a float32 waveform as a 16 kHz 16-bit WAV file."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes((np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes())
+    return buffer.getvalue()
+
+
+class LoadGenerator:
+    def __init__(self, args):
+        self.args = args
+        self.source = load_audio_file(args.audio)
+        self.stats = {mode: Stats() for mode in args.mode}
+        # (mode, audio_uid) -> send time of the newest clip, for results that arrive asynchronously
+        self.pending = {}
+        self.queue_depth = []
+        self.stop_at = None
+
+    def clip(self, seconds):
+        repeats = int(np.ceil(seconds * SAMPLE_RATE / len(self.source)))
+        return np.tile(self.source, repeats)[:int(seconds * SAMPLE_RATE)]
+
+    async def utterances(self, device_id):
+        """Yield (audio_uid, times, wav) for one device until the run ends, following the re-send pattern."""
+        rng = random.Random(f"{self.args.seed}-{device_id}")
+        index = 0
+        while time.monotonic() < self.stop_at:
+            await asyncio.sleep(rng.expovariate(self.args.rate))
+            audio_uid = f"{device_id}-{index}"
+            index += 1
+            seconds = rng.choice(self.args.clip_seconds)
+            resends = self.args.resend
+            for part in range(1, resends + 2):
+                if time.monotonic() >= self.stop_at:
+                    return
+                yield audio_uid, datetime.datetime.now().isoformat(), wav_bytes(self.clip(seconds * part / (resends + 1)))
+                if part <= resends:
+                    await asyncio.sleep(self.args.resend_interval)
+
+    def form(self, meeting_id, device_id, audio_uid, times):
+        return {"meeting_id": meeting_id, "device_id": device_id, "audio_uid": audio_uid,
+                "times": times, "o_lang": self.args.ori, "t_lang": self.args.tar}
+
+    async def rtt_device(self, client, meeting_id, device_id):
+        stats = self.stats["rtt"]
+        async for audio_uid, times, data in self.utterances(device_id):
+            stats.counts["sent"] += 1
+            start = time.monotonic()
+            try:
+                response = await client.post("/rtt_translate/v2", data=self.form(meeting_id, device_id, audio_uid, times),
+                                             files={"file": ("clip.wav", data, "audio/wav")})
+            except httpx.HTTPError:
+                stats.record("error")
+                continue
+            if response.status_code == 429:
+                stats.record("rejected")
+            elif response.status_code != 200:
+                stats.record("error")
+            else:
+                stats.record(classify(response.json()), time.monotonic() - start)
+
+    async def sse_device(self, client, meeting_id, device_id):
+        stats = self.stats["sse"]
+        async for audio_uid, times, data in self.utterances(device_id):
+            stats.counts["sent"] += 1
+            self.pending[("sse", audio_uid)] = time.monotonic()
+            try:
+                response = await client.post("/sse_rtt_translate/v2", data=self.form(meeting_id, device_id, audio_uid, times),
+                                             files={"file": ("clip.wav", data, "audio/wav")})
+            except httpx.HTTPError:
+                stats.record("error")
+                continue
+            if response.status_code == 429:
+                stats.record("rejected")
+                self.pending.pop(("sse", audio_uid), None)
+            elif response.status_code != 200 or response.json().get("status") != "OK":
+                stats.record("error")
+                self.pending.pop(("sse", audio_uid), None)
+
+    async def sse_consumer(self, client, meeting_id):
+        """Read the SSE stream of the meeting and match results to the clips by audio_uid."""
+        stats = self.stats["sse"]
+        try:
+            async with client.stream("GET", "/sse_rtt_translate", params={"meeting_id": meeting_id}, timeout=None) as response:
+                async for line in response.aiter_lines():
+                    uid = re.search(r"audio_uid='([^']*)'", line)
+                    status = re.search(r"status='(\w+)'", line)
+                    if not uid or not status:
+                        continue
+                    sent = self.pending.pop(("sse", uid.group(1)), None)
+                    if sent is not None:
+                        stats.record("ok" if status.group(1) == "OK" else "failed", time.monotonic() - sent)
+        except (httpx.HTTPError, asyncio.CancelledError):
+            pass
+
+    async def ws_device(self, meeting_id, device_id):
+        stats = self.stats["ws"]
+        url = self.args.server.replace("http", "ws", 1) + "/ws/rtt_translate"
+        try:
+            async with websockets.connect(url, max_size=None) as websocket:
+                async def receive():
+                    async for message in websocket:
+                        body = json.loads(message)
+                        audio_uid = (body.get("data") or {}).get("audio_uid")
+                        sent = self.pending.pop(("ws", audio_uid), None)
+                        if sent is None:
+                            continue
+                        if "busy" in body.get("message", ""):
+                            stats.record("rejected")
+                        else:
+                            stats.record(classify(body), time.monotonic() - sent)
+
+                receiver = asyncio.create_task(receive())
+                async for audio_uid, times, data in self.utterances(device_id):
+                    stats.counts["sent"] += 1
+                    self.pending[("ws", audio_uid)] = time.monotonic()
+                    await websocket.send(json.dumps(self.form(meeting_id, device_id, audio_uid, times)))
+                    await websocket.send(data)
+                # Give the last results time to arrive
+                await asyncio.sleep(self.args.drain)
+                receiver.cancel()
+        except (OSError, websockets.WebSocketException):
+            stats.record("error")
+
+    async def sample_queue(self, client):
+        start = time.monotonic()
+        while True:
+            try:
+                data = (await client.get("/get_queue_status")).json()["data"]
+                self.queue_depth.append({"t": round(time.monotonic() - start, 2), "queue_depth": data["queue_depth"],
+                                         "in_flight": data["in_flight"], "estimated_wait": data["estimated_wait"]})
+            except (httpx.HTTPError, KeyError, TypeError, ValueError):
+                pass
+            await asyncio.sleep(self.args.sample_interval)
+
+    async def run(self):
+        self.stop_at = time.monotonic() + self.args.duration
+        async with httpx.AsyncClient(base_url=self.args.server, timeout=self.args.timeout) as client:
+            background = [asyncio.create_task(self.sample_queue(client))]
+            producers = []
+            for device in range(self.args.devices):
+                meeting_id = f"meeting-{device % self.args.meetings}"
+                device_id = f"device-{device}"
+                if "rtt" in self.args.mode:
+                    producers.append(self.rtt_device(client, meeting_id, f"{device_id}-rtt"))
+                if "sse" in self.args.mode:
+                    producers.append(self.sse_device(client, meeting_id, f"{device_id}-sse"))
+                if "ws" in self.args.mode:
+                    producers.append(self.ws_device(meeting_id, f"{device_id}-ws"))
+            if "sse" in self.args.mode:
+                background += [asyncio.create_task(self.sse_consumer(client, f"meeting-{m}")) for m in range(self.args.meetings)]
+                await asyncio.sleep(0.5)  # let the SSE consumers subscribe first
+
+            await asyncio.gather(*producers)
+            await asyncio.sleep(self.args.drain)
+            for task in background:
+                task.cancel()
+
+        return {
+            "config": {key: value for key, value in vars(self.args).items()},
+            "modes": {mode: stats.report(sum(1 for m, _ in self.pending if m == mode)) for mode, stats in self.stats.items()},
+            "queue_depth": self.queue_depth,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay meeting traffic against a running main.py.")
+    parser.add_argument("--server", default="http://127.0.0.1:80")
+    parser.add_argument("--mode", nargs="+", choices=["rtt", "sse", "ws"], default=["rtt"])
+    parser.add_argument("--devices", type=int, default=10, help="devices per mode")
+    parser.add_argument("--meetings", type=int, default=2, help="devices are spread over this many meetings")
+    parser.add_argument("--rate", type=float, default=0.5, help="new utterances per second per device (Poisson)")
+    parser.add_argument("--clip-seconds", type=float, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--resend", type=int, default=2, help="times each audio_uid is re-sent with a longer clip")
+    parser.add_argument("--resend-interval", type=float, default=0.5)
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of traffic")
+    parser.add_argument("--drain", type=float, default=10.0, help="seconds to wait for outstanding results")
+    parser.add_argument("--timeout", type=float, default=30.0, help="HTTP timeout in seconds")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="queue depth sampling interval")
+    parser.add_argument("--audio", default=os.path.join(ROOT, "audio/test.wav"))
+    parser.add_argument("--ori", default="en")
+    parser.add_argument("--tar", default="zh")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(LoadGenerator(args).run())
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
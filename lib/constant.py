@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+import os
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Literal, Optional
 import torch
 from datetime import datetime
 
@@ -7,8 +9,13 @@ from datetime import datetime
 class ModlePath(BaseModel):
     large_v2: str = "/mnt/models/large-v2.pt"
     medium: str = "/mnt/models/medium.pt"
+    tiny: str = "/mnt/models/tiny.pt"
+    ct2_medium: str = "/mnt/models/faster-whisper-medium"      # CTranslate2 conversions
+    ct2_large_v2: str = "/mnt/models/faster-whisper-large-v2"
     sensevoice: str = "/mnt/models/SenseVoiceSmall"
     punc: str = "/mnt/models/ct-punc"
+    sensevoice_onnx: str = "/mnt/models/SenseVoiceSmall"    # ONNX graphs exported by api/onnx_export.py
+    punc_onnx: str = "/mnt/models/ct-punc"
     gemma: str = "google/gemma-3-4b-it"
 
 #############################################################################
@@ -19,6 +26,7 @@ OPTIONS = {
     "task": "transcribe",
     "logprob_threshold": -1.0,
     "no_speech_threshold": 0.6, # default 0.6 | ours 0.2
+    "compression_ratio_threshold": 2.4,
 }
 
 SV_OPTIONS = {
@@ -27,6 +35,61 @@ SV_OPTIONS = {
     "ban_emo_unk": False,
 }
 
+# Immutable per-request decode options (defaults follow OPTIONS / SV_OPTIONS, which are never mutated)
+class DecodeOptions(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    language: Optional[str] = None
+    task: str = OPTIONS["task"]
+    fp16: bool = OPTIONS["fp16"]
+    logprob_threshold: Optional[float] = OPTIONS["logprob_threshold"]
+    no_speech_threshold: Optional[float] = OPTIONS["no_speech_threshold"]
+    beam_size: Optional[int] = None
+    # Temperature fallback policy (see FALLBACK_POLICY)
+    temperature: tuple = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+    max_fallbacks: Optional[int] = None
+    min_fallback_remaining: float = 0.0
+    short_clip: Optional[bool] = None  # None follows SHORT_CLIP["models"]
+    initial_prompt: Optional[str] = None  # Whisper only, e.g. the committed text of a stream
+    itn: bool = SV_OPTIONS["itn"]
+    ban_emo_unk: bool = SV_OPTIONS["ban_emo_unk"]
+
+    def whisper_options(self):
+        """Keyword arguments for `whisper.transcribe`."""
+        options = {
+            "fp16": self.fp16,
+            "language": self.language,
+            "task": self.task,
+            "logprob_threshold": self.logprob_threshold,
+            "no_speech_threshold": self.no_speech_threshold,
+            "temperature": self.temperature,
+        }
+        if self.beam_size is not None:
+            options["beam_size"] = self.beam_size
+        if self.initial_prompt:
+            options["initial_prompt"] = self.initial_prompt
+        return options
+
+    def sensevoice_options(self):
+        """Keyword arguments for SenseVoice `AutoModel.generate`."""
+        return {
+            "language": self.language or SV_OPTIONS["language"],
+            "itn": self.itn,
+            "ban_emo_unk": self.ban_emo_unk,
+        }
+
+# Whisper temperature fallback policy per endpoint profile and model ("default" for the others).
+# Realtime endpoints cap re-decodes and skip them when the deadline is close, offline ones keep full quality.
+FALLBACK_POLICY = {
+    "realtime": {
+        "default": {"temperature": (0.0, 0.4, 0.8), "max_fallbacks": 1, "min_fallback_remaining": 1.0},
+        "large_v2": {"temperature": (0.0, 0.4, 0.8), "max_fallbacks": 1, "min_fallback_remaining": 2.0},
+    },
+    "offline": {
+        "default": {"temperature": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0), "max_fallbacks": None, "min_fallback_remaining": 0.0},
+    },
+}
+
 SENSEVOCIE_PARMATER = {"model": "/mnt/models/SenseVoiceSmall",
                         "disable_update": True,
                         "disable_pbar": True,
@@ -39,16 +102,123 @@ PUNC_PARMATER = {"model": "/mnt/models/ct-punc",
                         "device": "cuda" if torch.cuda.is_available() else "cpu",            
                         }
 
+# ONNX Runtime variant of SenseVoice / ct-punc (sensevoice_onnx), CPU by default
+ONNX_PARAMETER = {"sensevoice": "/mnt/models/SenseVoiceSmall",
+                  "punc": "/mnt/models/ct-punc",
+                  "quantize": True,             # int8 model_quant.onnx
+                  "intra_op_num_threads": 4,
+                  "device_id": "-1",            # "-1" for CPU, a GPU index needs onnxruntime-gpu
+                  }
+
+# SenseVoice variants and the punctuation model each of them uses
+SENSEVOICE_PUNC = {"sensevoice": "punc", "sensevoice_onnx": "punc_onnx"}
+
+# Streaming transcription (/ws/rtt_translate/stream)
+STREAM_PARAMETER = {"step_ms": 500,        # decode the open segment again after this much new audio
+                    "endpoint_ms": 600,    # a pause this long finalizes the segment
+                    "max_segment_s": 15,   # segments are finalized at this length even without a pause
+                    "agreement": 2,        # tokens are committed once this many hypotheses agree
+                    "cut_ms": 200,         # committed audio ending in a pause this long is not decoded again
+                    }
+
+# Loaded models stay resident up to this budget (least recently used ones are evicted)
+MODEL_MEMORY_BUDGET_MB = 12000
+# Expected memory of each model before it is first loaded (replaced by the measured size afterwards)
+MODEL_MEMORY_MB = {"large_v2": 6200,
+                   "medium": 3100,
+                   "tiny": 150,
+                   "ct2_medium": 800,
+                   "ct2_large_v2": 1600,
+                   "sensevoice": 950,
+                   "punc": 300,
+                   "sensevoice_onnx": 250,
+                   "punc_onnx": 80,
+                   }
+
+# Admission control, requests beyond these limits are rejected with 429
+ADMISSION_PARAMETER = {"max_queue_depth": 64,   # waiting + running jobs
+                       "max_wait_s": 10.0,      # estimated wait (queued audio seconds x RTF)
+                       "initial_rtf": 0.2,      # RTF assumed before a model has served a request
+                       "rtf_smoothing": 0.1,    # weight of the newest measurement in the RTF moving average
+                       }
+
+# Histogram buckets (seconds) of the /metrics latency histograms
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Deterministic stub ASR / translators for load tests without a GPU or network (STUB_ASR=1 / STUB_TRANSLATORS=1)
+STUB_BACKENDS = {"asr": os.environ.get("STUB_ASR", "0") == "1",
+                 "translators": os.environ.get("STUB_TRANSLATORS", "0") == "1",
+                 "asr_rtf": float(os.environ.get("STUB_ASR_RTF", "0.05")),       # stub inference seconds per audio second
+                 "latency": float(os.environ.get("STUB_LATENCY", "0.0")),        # stub translation round trip in seconds
+                 }
+
+# Pooled connections of the async translator clients
+ASYNC_HTTP = {"max_connections": 32,
+              "max_keepalive_connections": 16,
+              "timeout": 30.0,
+              }
+
+# Batch text translation (/text_translate/batch)
+TRANSLATE_BATCH = {"max_segments": 20,   # segments per backend call
+                   "max_chars": 4000,    # characters per backend call
+                   "concurrency": 4,     # backend calls running at once
+                   }
+BATCH_TRANSLATE_INSTRUCTION = ("Translate each of the following {count} numbered lines separately. "
+                               "Reply with exactly {count} lines, numbered the same way, and nothing else.")
+
+# Freshly loaded models are warmed up on this clip before they serve traffic
+WARMUP_AUDIO = "audio/test.wav"
+WARMUP_ROUNDS = 5
+
 # The whisper inference max waiting time (if over the time will stop it)
 WAITING_TIME = 30
 
+# Extra seconds the endpoint waits past the deadline so the worker can return its partial result
+DEADLINE_GRACE = 1.0
+
+# The number of inference workers owned by the Model (bounded worker pool)
+INFERENCE_WORKERS = 8
+
+# Micro-batching of concurrent Whisper clips (clips up to 30 s are decoded together in one pass)
+IS_BATCH = True
+BATCH_WINDOW_MS = 30
+MAX_BATCH_SIZE = 8
+
+# Short-clip encoder mode: Whisper clips up to `max_seconds` are encoded over a mel as long as the clip
+# (plus `padding_seconds`, rounded up to whole seconds) instead of a padded 30 s window.
+# Enable a model (SHORT_CLIP_MODELS=tiny,large_v2) only once `benchmark_pipeline.py --short-clip-check`
+# reports a word error rate against the full window below `max_wer` for it.
+SHORT_CLIP = {"models": set(filter(None, os.environ.get("SHORT_CLIP_MODELS", "").split(","))),
+              "max_seconds": 10.0,
+              "padding_seconds": 1.0,
+              "max_wer": 0.05,
+              }
+
+# The sample rate every uploaded clip is decoded to (required by Whisper and SenseVoice)
+SAMPLE_RATE = 16000
+
 IS_PUNC = True
 
+# Energy / zero-crossing VAD in front of the ASR model (silent clips are skipped, the rest trimmed)
+IS_VAD = True
+VAD_PARAMETER = {"frame_ms": 30,        # analysis frame length
+                 "min_energy_db": -70,  # absolute energy floor of a speech frame (dBFS), only rules out digital silence
+                 "margin_db": 10,       # required energy above the clip's noise floor
+                 "speech_energy_db": -35,  # frames louder than this are speech even without pauses in the clip
+                 "max_zcr": 0.35,       # zero-crossing rate above which quiet frames count as noise
+                 "min_speech_ms": 150,  # clips with less speech than this are skipped
+                 "padding_ms": 200,     # silence kept around the detected speech
+                 }
+
 #############################################################################
 
 # Request body model for loading a model
 class LoadModelRequest(BaseModel):
     models_name: str
+    # CTranslate2 engine settings (ct2_* models only), CT2_PARAMETER by default
+    compute_type: Optional[Literal['int8', 'float16', 'float32']] = None
+    intra_threads: Optional[int] = Field(None, ge=1)
+    inter_threads: Optional[int] = Field(None, ge=1)
     
 # Request for loading new translate method
 class LoadMethodRequest(BaseModel):
@@ -78,9 +248,38 @@ class ResponseSTT(BaseModel):
     audio_uid: str
     transcribe_time: float
     translate_time: float
+    vad_skipped: bool = False  # the VAD found no speech in the clip
+    vad_trimmed_seconds: float = 0.0  # leading / trailing silence the VAD cut off
+    fallbacks: int = 0  # Whisper temperature fallbacks that ran
     
 #############################################################################
 
+# Header sent before every PCM frame of /ws/rtt_translate/stream
+class StreamingData(BaseModel):
+    meeting_id: str
+    device_id: str
+    audio_uid: str
+    o_lang: str
+    t_lang: str
+    is_final: bool = False  # the last frame of this audio_uid
+
+class StreamingResponseSTT(BaseModel):
+    meeting_id: str
+    device_id: str
+    audio_uid: str
+    event: str  # "partial" or "final"
+    segment_id: int
+    ori_lang: str
+    ori_text: str
+    committed_text: str
+    unstable_text: str
+    trans_lang: str
+    trans_text: str
+    transcribe_time: float
+    translate_time: float
+
+#############################################################################
+
 class VSTTranscriptionData(BaseModel):
     audio_uid: str
     sample_rate: int
@@ -93,12 +292,14 @@ class VSTTranscriptionData(BaseModel):
 class VSTResponseSTT(BaseModel):
     ori_text: str
     tar_text: str
+    fallbacks: int = 0  # Whisper temperature fallbacks that ran
 
 #############################################################################
 
 class VSTResponseSTT(BaseModel):
     ori_text: str
     tar_text: str
+    fallbacks: int = 0  # Whisper temperature fallbacks that ran
 
 #############################################################################
 
@@ -106,6 +307,14 @@ class TextData(BaseModel):
     ori_text: str
     o_lang: str
     t_lang: str
+
+class TextMultiData(BaseModel):
+    ori_text: str
+    o_lang: str
+    t_langs: List[str]
+
+class TextBatchData(BaseModel):
+    segments: List[TextData]
     
 #############################################################################
 
@@ -114,7 +323,15 @@ LANGUAGE_LIST = ['zh', 'en', 'ja', 'ko', "de", "es"]
 #############################################################################
 
 # google or argos or gpt-4o
-ASR_METHODS = ['medium', 'large_v2', 'sensevoice']
+ASR_METHODS = ['medium', 'large_v2', 'sensevoice', 'sensevoice_onnx', 'ct2_medium', 'ct2_large_v2']
+
+# CTranslate2 (faster-whisper) engine of the ct2_* models
+CT2_MODELS = ['ct2_medium', 'ct2_large_v2']
+CT2_PARAMETER = {"device": "cuda" if torch.cuda.is_available() else "cpu",
+                 "compute_type": "float16" if torch.cuda.is_available() else "int8",
+                 "intra_threads": 0,    # threads per transcription on CPU, 0 for the CTranslate2 default
+                 "inter_threads": 1,    # transcriptions run in parallel
+                 }
 TRANSLATE_METHODS = ['google', 'gemma', 'qwen', 'gpt-4o']
 OLLAMA_MODEL = {
     "gemma": "/mnt/lib/gemma3_12b-it-qat.yaml",
@@ -123,6 +340,13 @@ OLLAMA_MODEL = {
 
 #############################################################################
 
+# Translation cache keyed by (translate method, ori, tar, normalized text)
+TRANSLATE_CACHE = {"max_size": 20000,                               # LRU bound
+                   "ttl": 7 * 24 * 60 * 60,                         # seconds an entry stays valid
+                   "persist_path": "cache/translate_cache.json",    # None to keep it in memory only
+                   "save_interval": 5 * 60,                         # seconds between saves of a changed cache
+                   }
+
 AZURE_CONFIG = '/mnt/lib/azure_config.yaml'
 # GEMMA_12B_QAT_CONFIG = '/mnt/lib/gemma_12b_qat.yaml'
 
@@ -1,19 +1,26 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File, WebSocket, WebSocketDisconnect, Form, Depends
-from fastapi.responses import StreamingResponse  
+from fastapi.responses import StreamingResponse, PlainTextResponse  
 import os  
 import time  
 import pytz  
 import asyncio  
 import logging  
+import logging.handlers  
 import uvicorn  
 import datetime  
-import threading 
+import functools  
 from queue import Queue  
 from threading import Thread, Event  
 from api.model import Model  
-from api.threading_api import translate_and_print, ws_translate_and_print, waiting_times, stop_thread
+from api.audio_utils import decode_audio_bytes, pcm16_to_float32
+from api.streaming import StreamingSession
+from api.threading_api import transcribe_and_translate
+from api.deadline import Deadline, InferenceTimeout
+from api.job_queue import JobQueue, ResultBroker
+from api.admission import Overloaded
+from api.metrics import REGISTRY, TIMEOUTS, QUEUE_DEPTH, IN_FLIGHT, REJECTED, REAL_TIME_FACTOR, CACHE_HIT_RATE, VAD_SKIP_RATE
 from lib.base_object import BaseResponse  
-from lib.constant import ResponseSTT, LoadModelRequest, LoadMethodRequest, TranscriptionData, VSTTranscriptionData, VSTResponseSTT, TextData, WAITING_TIME, LANGUAGE_LIST, ASR_METHODS, TRANSLATE_METHODS  
+from lib.constant import ResponseSTT, LoadModelRequest, LoadMethodRequest, TranscriptionData, StreamingData, StreamingResponseSTT, VSTTranscriptionData, VSTResponseSTT, TextData, TextMultiData, TextBatchData, WAITING_TIME, DEADLINE_GRACE, INFERENCE_WORKERS, SAMPLE_RATE, STUB_BACKENDS, LANGUAGE_LIST, ASR_METHODS, TRANSLATE_METHODS, CT2_MODELS  
   
 #############################################################################  
   
@@ -53,12 +60,118 @@ tz = pytz.timezone('Asia/Taipei')
 local_now = utc_now.astimezone(tz)  
   
 app = FastAPI()  
-model = Model()  
+model = Model(stub_translators=STUB_BACKENDS["translators"], stub_latency=STUB_BACKENDS["latency"])  
 queue = Queue()  
-waiting_list = []
-
-# Global event to control SSE connection  
-sse_stop_event = Event()  
+# Clips of every WebSocket / SSE session, served round-robin across meetings and devices  
+jobs = JobQueue()  
+# Results of the SSE uploads, pushed to the SSE connections of their meeting  
+sse_results = ResultBroker()  
+  
+# Gauges read at scrape time, so they cost nothing between scrapes  
+QUEUE_DEPTH.set_function(lambda: len(jobs))  
+IN_FLIGHT.set_function(lambda: model.admission.in_flight)  
+REJECTED.set_function(lambda: model.admission.rejected)  
+REAL_TIME_FACTOR.set_function(lambda: model.admission.status(model.model_version)["rtf"])  
+CACHE_HIT_RATE.set_function(lambda: model.translate_cache.stats()["hit_rate"])  
+VAD_SKIP_RATE.set_function(lambda: model.vad.skip_rate)  
+  
+async def run_inference(audio, o_lang, t_lang, timeout, profile="realtime", stats=None):  
+    """  
+    Transcribe and translate an audio clip on the model's inference worker pool.  
+  
+    The event loop stays free while the job runs, so other requests, health checks  
+    and WebSockets are still served. The job carries a deadline of `timeout` seconds  
+    and stops itself at the next decode window once it has passed, which frees the worker.  
+  
+    :param audio: np.ndarray  
+        The decoded 16 kHz waveform.  
+    :param o_lang: str  
+        The original language of the audio.  
+    :param t_lang: str  
+        The target language for translation.  
+    :param timeout: float  
+        The time budget of the job.  
+    :param profile: str  
+        The temperature fallback profile of the endpoint ("realtime" or "offline").  
+    :param stats: dict  
+        Optional dict that receives decode stats ("fallbacks", "vad_skipped", "vad_trimmed_seconds").  
+    :rtype: tuple  
+        (transcription, translation, inference time, translate time, translate method)  
+    :raises InferenceTimeout: If the job hit its deadline, carrying the partial transcription.  
+    :raises asyncio.TimeoutError: If the job did not even return within the grace period.  
+    """  
+    deadline = Deadline(timeout)  
+    with model.admission.track(len(audio) / SAMPLE_RATE):  
+        future = model.run_in_executor(transcribe_and_translate, model, audio, o_lang, t_lang, deadline, profile, stats)  
+        try:  
+            return await asyncio.wait_for(future, timeout + DEADLINE_GRACE)  
+        except InferenceTimeout as e:  
+            TIMEOUTS.inc(stage=e.stage)  
+            raise  
+        except asyncio.TimeoutError:  
+            TIMEOUTS.inc(stage="grace")  
+            raise  
+  
+def admit():  
+    """  
+    Admission control in front of the inference path.  
+  
+    :raises HTTPException: 429 with a Retry-After hint if too many jobs are waiting  
+        or the estimated wait is too long.  
+    """  
+    try:  
+        model.admission.check(model.model_version, len(jobs), jobs.queued_seconds)  
+    except Overloaded as e:  
+        raise HTTPException(status_code=429, detail=f"Server is busy: {e.reason}", headers={"Retry-After": str(e.retry_after)})  
+  
+async def process_job(response_data, audio):  
+    """  
+    Transcribe and translate a queued clip.  
+  
+    :param response_data: ResponseSTT  
+        The response skeleton of the clip, filled in place.  
+    :param audio: np.ndarray  
+        The decoded waveform.  
+    :rtype: BaseResponse | None  
+        The response to deliver, or None if the job exceeded the upper limit time.  
+    """  
+    stats = {}  
+    try:  
+        # Run the job on the inference worker pool without blocking the event loop  
+        o_result, t_result, inference_time, g_translate_time, translate_method = await run_inference(audio, response_data.ori_lang, response_data.trans_lang, WAITING_TIME, stats=stats)  
+    except (asyncio.TimeoutError, InferenceTimeout):  
+        logger.info(f" | Inference has exceeded the upper limit time and has been stopped |")  
+        return None  
+    except Exception as e:  
+        logger.error(f' | inference() error: {e} | ')  
+        return BaseResponse(status="FAILED", message=f" | inference() error: {e} | ", data=response_data)  
+  
+    response_data.ori_text = o_result  
+    response_data.trans_text = t_result  
+    response_data.transcribe_time = inference_time  
+    response_data.translate_time = g_translate_time  
+    response_data.vad_skipped = stats.get("vad_skipped", False)  
+    response_data.vad_trimmed_seconds = stats.get("vad_trimmed_seconds", 0.0)  
+    response_data.fallbacks = stats.get("fallbacks", 0)  
+  
+    logger.debug(response_data.model_dump_json())  
+    logger.info(f" | device_id: {response_data.device_id} | audio_uid: {response_data.audio_uid} | language: {response_data.ori_lang} -> {response_data.trans_lang} | translate_method: {translate_method} | ")  
+    logger.info(f" | transcription: {response_data.ori_text} | ")  
+    logger.info(f" | translation: {response_data.trans_text} | ")  
+    logger.info(f" | Inference completed in {inference_time:.2f} seconds. Translation completed in {g_translate_time:.2f} seconds. | ")  
+    return BaseResponse(status="OK", message=f" | transcription: {response_data.ori_text} | translation: {response_data.trans_text} | ", data=response_data)  
+  
+async def job_worker():  
+    """Run queued clips as they arrive and hand each result to the result channel of its session."""  
+    while True:  
+        response_data, audio, deliver = await jobs.get()  
+        # One failing job or result channel must not take the worker down  
+        try:  
+            base_response = await process_job(response_data, audio)  
+            if base_response is not None:  
+                deliver(base_response)  
+        except Exception as e:  
+            logger.error(f" | job_worker() audio_uid: {response_data.audio_uid} | error: {e} | ")  
   
 @app.get("/")  
 def HelloWorld(name:str=None):  
@@ -79,20 +192,17 @@ async def load_default_model_preheat():
     :rtype: None: The function does not return any value.  
     :logs: Loading and preheating status and times.  
     """  
+    # Start dispatching the queued clips, one dispatcher per inference worker  
+    for _ in range(INFERENCE_WORKERS):  
+        asyncio.create_task(job_worker())  
     logger.info(f" | ##################################################### | ")  
     logger.info(f" | Start to loading default model. | ")  
-    # load model  
-    default_model = "large_v2"  
-    model.load_model(default_model)  # Directly load the default model  
-    logger.info(f" | Default model {default_model} has been loaded successfully. | ")  
-    # preheat  
-    logger.info(f" | Start to preheat model. | ")  
-    default_audio = "audio/test.wav"  
+    # load and preheat the model off the event loop  
+    default_model = "stub" if STUB_BACKENDS["asr"] else "large_v2"  
     start = time.time()  
-    for _ in range(5):  
-        model.transcribe(default_audio, "en")  
+    await asyncio.wrap_future(model.start_load_model(default_model))  
     end = time.time()  
-    logger.info(f" | Preheat model has been completed in {end - start:.2f} seconds. | ")  
+    logger.info(f" | Default model {default_model} has been loaded and preheated in {end - start:.2f} seconds. | ")  
     logger.info(f" | ##################################################### | ")  
     delete_old_audio_files()  
 
@@ -103,6 +213,18 @@ async def get_items():
     logger.info(f" | ############################################################### | ")  
     return BaseResponse(message=f" | current ASR model is {model.model_version} | ", data=model.model_version)  
 
+@app.get("/get_translate_cache_stats")  
+async def get_translate_cache_stats():  
+    """  
+    Get the hit / miss counters of the translation cache.  
+  
+    :rtype: BaseResponse  
+        A response containing the cache size, hits, misses and hit rate.  
+    """  
+    stats = model.translate_cache.stats()  
+    logger.info(f" | translate cache stats: {stats} | ")  
+    return BaseResponse(message=f" | translate cache hit rate: {stats['hit_rate']:.2%} | ", data=stats)  
+
 @app.get("/list_optional_items")  
 async def get_items():  
     """  
@@ -151,26 +273,71 @@ async def load_model(request: LoadModelRequest):
     Load a specified model.  
       
     This endpoint allows the user to load a specified model for inference.  
+    The model is loaded and warmed up in the background and swapped in once it  
+    is ready; until then requests are served by the current model.  
       
     :param request: LoadModelRequest  
-        The request object containing the model's name to be loaded.  
+        The request object containing the model's name to be loaded, and for ct2_* models  
+        optionally the CTranslate2 compute type and intra / inter thread counts.  
     :rtype: BaseResponse  
         A response indicating the success or failure of the model loading process.  
     """  
     # Convert the model's name to lowercase  
     models_name = request.models_name.lower()  
       
-    # Check if the model's name exists in the model's path  
-    if not hasattr(model.models_path, models_name):  
+    # Check if the model's name is a supported ASR model  
+    if models_name not in ASR_METHODS:  
         # Raise an HTTPException if the model is not found  
         raise HTTPException(status_code=400, detail="Model not found")  
       
-    # Load the specified model  
-    model.load_model(models_name)  
-    logger.info(f" | Model {request.models_name} has been loaded successfully. | ")  
+    # CTranslate2 engine settings, only the ones given override CT2_PARAMETER  
+    engine_options = {key: value for key, value in request.model_dump(include={"compute_type", "intra_threads", "inter_threads"}).items() if value is not None}  
+    if engine_options and models_name not in CT2_MODELS:  
+        raise HTTPException(status_code=400, detail=f"compute_type / intra_threads / inter_threads only apply to {CT2_MODELS}")  
       
-    # Return a response indicating the success of the model loading process  
-    return BaseResponse(message=f" | Model {request.models_name} has been loaded successfully. | ", data=None)  
+    # Load the specified model in the background, the current model keeps serving until it is ready  
+    try:  
+        model.start_load_model(models_name, engine_options)  
+    except RuntimeError as e:  
+        raise HTTPException(status_code=409, detail=str(e))  
+    logger.info(f" | Model {request.models_name} is loading in the background. | ")  
+      
+    # Return a response indicating the model loading has started  
+    return BaseResponse(message=f" | Model {request.models_name} is loading in the background, check /get_model_load_state. | ", data=model.get_load_state())  
+  
+@app.get("/metrics")  
+async def metrics():  
+    """  
+    Prometheus metrics: decode / transcription / punctuation / translation latency  
+    histograms, model load durations, timeouts, queue depth, in-flight jobs, RTF per  
+    model, translation cache hit rate and VAD skip rate.  
+    """  
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")  
+  
+@app.get("/get_queue_status")  
+async def get_queue_status():  
+    """  
+    Get the queue depth and wait estimate, so load balancers can route away from a saturated replica.  
+  
+    :rtype: BaseResponse  
+        A response containing the queue depth, in-flight jobs, estimated wait, measured RTF  
+        of every model, the admission limits and the waiting jobs of every meeting / device.  
+    """  
+    status = model.admission.status(model.model_version, len(jobs), jobs.queued_seconds)  
+    status["devices"] = jobs.depths()  
+    return BaseResponse(message=f" | queue depth: {status['queue_depth']} | estimated wait: {status['estimated_wait']:.2f} seconds | ", data=status)  
+  
+@app.get("/get_model_load_state")  
+async def get_model_load_state():  
+    """  
+    Get the state of the background model loading.  
+  
+    :rtype: BaseResponse  
+        A response containing the load state (idle / loading / warming / ready / failed),  
+        the model being loaded, the active model and the last load error.  
+    """  
+    state = model.get_load_state()  
+    return BaseResponse(message=f" | model load state: {state['state']} | ", data=state)  
   
   
 @app.post("/rtt_translate", description="**[DEPRECATED]** This endpoint is deprecated and will be removed in the future. Please use `/rtt_translate/v2` instead.")  
@@ -222,15 +389,16 @@ async def rtt_translate(
         translate_time=0.0,  
     )  
   
-    # Save the uploaded audio file  
-    file_name = times + ".wav"  
-    audio_buffer = f"audio/{file_name}"  
-    with open(audio_buffer, 'wb') as f:  
-        f.write(file.file.read())  
+    # Decode the uploaded audio in memory, off the event loop (non-WAV input spawns ffmpeg)  
+    try:  
+        audio_buffer = await asyncio.to_thread(decode_audio_bytes, await file.read())  
+    except Exception as e:  
+        logger.error(f" | decode audio error: {e} | ")  
+        raise HTTPException(status_code=400, detail=f"The audio file could not be decoded: {e}")  
   
-    # Check if the audio file exists  
-    if not os.path.exists(audio_buffer):  
-        return BaseResponse(status="FAILED", message=" | The audio file does not exist, please check the audio path. | ", data=response_data)  
+    # Check if the audio is empty  
+    if audio_buffer.size == 0:  
+        return BaseResponse(status="FAILED", message=" | The audio file is empty, please check the audio. | ", data=response_data)  
   
     # Check if the model has been loaded  
     if model.model_version is None:  
@@ -241,34 +409,29 @@ async def rtt_translate(
         logger.info(f" | One or both languages are not in LANGUAGE_LIST: {LANGUAGE_LIST}. | ")  
         return BaseResponse(status="FAILED", message=f" | One or both languages are not in LANGUAGE_LIST: {LANGUAGE_LIST}. | ", data=response_data)  
   
-    try:  
-        # Create a queue to hold the return value  
-        result_queue = Queue()  
-        # Create an event to signal stopping  
-        stop_event = threading.Event()  
-  
-        # Create timing thread and inference thread  
-        time_thread = threading.Thread(target=waiting_times, args=(stop_event, model, WAITING_TIME))  
-        inference_thread = threading.Thread(target=translate_and_print, args=(model, audio_buffer, result_queue, o_lang, t_lang, stop_event))  
-  
-        # Start the threads  
-        time_thread.start()  
-        inference_thread.start()  
-  
-        # Wait for timing thread to complete and check if the inference thread is active to close  
-        time_thread.join()  
-        stop_thread(inference_thread)  
+    # Reject with 429 when the inference path is saturated  
+    admit()  
   
-        # Remove the audio buffer file
-        os.remove(audio_buffer)  
-  
-        # Get the result from the queue  
-        if not result_queue.empty():  
-            o_result, t_result, inference_time, g_translate_time, translate_method = result_queue.get()  
+    stats = {}  
+    try:  
+        # Run the job on the inference worker pool without blocking the event loop  
+        try:  
+            result = await run_inference(audio_buffer, o_lang, t_lang, WAITING_TIME, stats=stats)  
+        except (asyncio.TimeoutError, InferenceTimeout) as e:  
+            result = None  
+            # Keep whatever was transcribed before the deadline  
+            response_data.ori_text = getattr(e, "partial", "")  
+  
+        # Get the result from the inference job  
+        if result is not None:  
+            o_result, t_result, inference_time, g_translate_time, translate_method = result  
             response_data.ori_text = o_result  
             response_data.trans_text = t_result  
             response_data.transcribe_time = inference_time  
             response_data.translate_time = g_translate_time  
+            response_data.vad_skipped = stats.get("vad_skipped", False)  
+            response_data.vad_trimmed_seconds = stats.get("vad_trimmed_seconds", 0.0)  
+            response_data.fallbacks = stats.get("fallbacks", 0)  
   
             logger.debug(response_data.model_dump_json())  
             logger.info(f" | device_id: {response_data.device_id} | audio_uid: {response_data.audio_uid} | language: {o_lang} -> {t_lang} | translate_method: {translate_method} |")  
@@ -339,15 +502,16 @@ async def rtt_translate(
         translate_time=0.0,  
     )  
   
-    # Save the uploaded audio file  
-    file_name = times + ".wav"  
-    audio_buffer = f"audio/{file_name}"  
-    with open(audio_buffer, 'wb') as f:  
-        f.write(file.file.read())  
+    # Decode the uploaded audio in memory, off the event loop (non-WAV input spawns ffmpeg)  
+    try:  
+        audio_buffer = await asyncio.to_thread(decode_audio_bytes, await file.read())  
+    except Exception as e:  
+        logger.error(f" | decode audio error: {e} | ")  
+        raise HTTPException(status_code=400, detail=f"The audio file could not be decoded: {e}")  
   
-    # Check if the audio file exists  
-    if not os.path.exists(audio_buffer):  
-        return BaseResponse(status="FAILED", message=" | The audio file does not exist, please check the audio path. | ", data=response_data)  
+    # Check if the audio is empty  
+    if audio_buffer.size == 0:  
+        return BaseResponse(status="FAILED", message=" | The audio file is empty, please check the audio. | ", data=response_data)  
   
     # Check if the model has been loaded  
     if model.model_version is None:  
@@ -358,34 +522,29 @@ async def rtt_translate(
         logger.info(f" | One or both languages are not in LANGUAGE_LIST: {LANGUAGE_LIST}. | ")  
         return BaseResponse(status="FAILED", message=f" | One or both languages are not in LANGUAGE_LIST: {LANGUAGE_LIST}. | ", data=response_data)  
   
-    try:  
-        # Create a queue to hold the return value  
-        result_queue = Queue()  
-        # Create an event to signal stopping  
-        stop_event = threading.Event()  
-  
-        # Create timing thread and inference thread  
-        time_thread = threading.Thread(target=waiting_times, args=(stop_event, model, WAITING_TIME))  
-        inference_thread = threading.Thread(target=translate_and_print, args=(model, audio_buffer, result_queue, o_lang, t_lang, stop_event))  
+    # Reject with 429 when the inference path is saturated  
+    admit()  
   
-        # Start the threads  
-        time_thread.start()  
-        inference_thread.start()  
-  
-        # Wait for timing thread to complete and check if the inference thread is active to close  
-        time_thread.join()  
-        stop_thread(inference_thread)  
-  
-        # Remove the audio buffer file  
-        os.remove(audio_buffer)  
-  
-        # Get the result from the queue  
-        if not result_queue.empty():  
-            o_result, t_result, inference_time, g_translate_time, translate_method = result_queue.get()  
+    stats = {}  
+    try:  
+        # Run the job on the inference worker pool without blocking the event loop  
+        try:  
+            result = await run_inference(audio_buffer, o_lang, t_lang, WAITING_TIME, stats=stats)  
+        except (asyncio.TimeoutError, InferenceTimeout) as e:  
+            result = None  
+            # Keep whatever was transcribed before the deadline  
+            response_data.ori_text = getattr(e, "partial", "")  
+  
+        # Get the result from the inference job  
+        if result is not None:  
+            o_result, t_result, inference_time, g_translate_time, translate_method = result  
             response_data.ori_text = o_result  
             response_data.trans_text = t_result  
             response_data.transcribe_time = inference_time  
             response_data.translate_time = g_translate_time  
+            response_data.vad_skipped = stats.get("vad_skipped", False)  
+            response_data.vad_trimmed_seconds = stats.get("vad_trimmed_seconds", 0.0)  
+            response_data.fallbacks = stats.get("fallbacks", 0)  
   
             logger.debug(response_data.model_dump_json())  
             logger.info(f" | device_id: {response_data.device_id} | audio_uid: {response_data.audio_uid} | language: {o_lang} -> {t_lang} | translate_method: {translate_method} |")  
@@ -414,66 +573,23 @@ async def websocket_endpoint(websocket: WebSocket):
         The WebSocket connection to the client.  
     """  
     await websocket.accept()  
-    waiting_list = []  
-  
-    # Clear the result queue  
-    while not model.result_queue.empty():  
-        model.result_queue.get()  
+    # The result channel of this connection, filled by the shared job workers  
+    results = asyncio.Queue()  
   
-    async def process_audio():  
+    async def send_results():  
         """  
-        Process audio files from the waiting list for transcription and translation.  
+        Send the results of this connection's clips back to the client.  
           
-        This function runs in a separate asyncio task and continuously processes  
-        audio files from the waiting list.  
+        This function runs in a separate asyncio task and wakes up as soon as a  
+        result is ready.  
         """  
         while True:  
-            if waiting_list and not model.processing:  
-                response_data = waiting_list[0].model_copy()  
-                waiting_list.pop(0)  
-                audio_buffer = f"audio/{response_data.times}.wav"  
-                o_lang = response_data.ori_lang  
-                t_lang = response_data.trans_lang  
+            base_response = await results.get()  
+            if base_response.status == "OK":  
+                await websocket.send_json(base_response.model_dump())  
   
-                try:  
-                    # Create an event to signal stopping  
-                    stop_event = threading.Event()  
-                    # Create timing thread and inference thread  
-                    time_thread = threading.Thread(target=waiting_times, args=(stop_event, model, WAITING_TIME))  
-                    inference_thread = threading.Thread(target=ws_translate_and_print, args=(model, audio_buffer, o_lang, t_lang, stop_event))  
-                      
-                    # Start the threads  
-                    time_thread.start()  
-                    inference_thread.start()  
-                      
-                    # Wait for timing thread to complete and stop the inference thread if still running  
-                    time_thread.join()  
-                    stop_thread(inference_thread)  
-                      
-                    # Remove the audio buffer file  
-                    os.remove(audio_buffer)  
-                      
-                    # Process results from the result queue  
-                    while not model.result_queue.empty():  
-                        o_result, t_result, inference_time, g_translate_time, translate_method = model.result_queue.get()  
-                        response_data.ori_text = o_result  
-                        response_data.trans_text = t_result  
-                        response_data.transcribe_time = inference_time  
-                        response_data.translate_time = g_translate_time  
-                          
-                        logger.debug(response_data.model_dump_json())  
-                        logger.info(f" | device_id: {response_data.device_id} | audio_uid: {response_data.audio_uid} | language: {response_data.ori_lang} -> {response_data.trans_lang} | translate_method: {translate_method} | ")  
-                        logger.info(f" | transcription: {response_data.ori_text} | ")  
-                        logger.info(f" | translation: {response_data.trans_text} | ")  
-                        logger.info(f" | Inference completed in {inference_time:.2f} seconds. Translation completed in {g_translate_time:.2f} seconds. | ")  
-                          
-                        await websocket.send_json(BaseResponse(status="OK", message=f" | transcription: {response_data.ori_text} | translation: {response_data.trans_text} | ", data=response_data).model_dump())  
-                except Exception as e:  
-                    logger.error(f' | inference() error: {e} | ')  
-            await asyncio.sleep(0.1)  
-  
-    # Create a background task to process audio files  
-    asyncio.create_task(process_audio())  
+    # Create a background task to send the results  
+    task = asyncio.create_task(send_results())  
   
     try:  
         while True:  
@@ -497,31 +613,170 @@ async def websocket_endpoint(websocket: WebSocket):
                 translate_time=0.0,  
             )  
   
-            previous_waiting_list = waiting_list.copy()  
-            audio_uid_exist = False  
-  
-            # Check if the audio UID already exists in the waiting list  
-            for item in previous_waiting_list:  
-                if item.audio_uid == response_data.audio_uid:  
-                    audio_uid_exist = True  
-                    if item.times < response_data.times:  
-                        waiting_list.remove(item)  
-                        waiting_list.append(response_data)  
-                        audio = f"audio/{item.times}.wav"  
-                        if os.path.exists(audio):  
-                            os.remove(audio)  
-                    break  
+            # A payload that cannot be decoded fails on its own, the connection stays open  
+            try:  
+                audio = await asyncio.to_thread(decode_audio_bytes, audio_bytes)  
+            except Exception as e:  
+                logger.error(f" | audio_uid: {response_data.audio_uid} | decode audio error: {e} | ")  
+                await websocket.send_json(BaseResponse(status="FAILED", message=f" | The audio file could not be decoded: {e} | ", data=response_data).model_dump())  
+                continue  
+  
+            try:  
+                model.admission.check(model.model_version, len(jobs), jobs.queued_seconds)  
+            except Overloaded as e:  
+                await websocket.send_json(BaseResponse(status="FAILED", message=f" | Server is busy: {e.reason}, retry after {e.retry_after} seconds | ", data=response_data).model_dump())  
+                continue  
+  
+            # A newer clip of the same audio UID replaces the waiting one  
+            jobs.put(response_data, audio, results.put_nowait)  
+    except WebSocketDisconnect:  
+        logger.info(" | Client disconnected | ")  
+    finally:  
+        task.cancel()  
+        # Nobody is left to receive the results of the clips still waiting  
+        dropped = jobs.discard(results.put_nowait)  
+        if dropped:  
+            logger.info(f" | {dropped} waiting clips of the closed connection have been dropped. | ")  
+        
+@app.websocket("/ws/rtt_translate/stream")  
+async def websocket_stream_endpoint(websocket: WebSocket):  
+    """  
+    WebSocket endpoint for incremental streaming transcription and translation.  
+  
+    The client sends a `StreamingData` JSON header followed by a frame of raw 16 kHz  
+    16-bit PCM, repeatedly. Frames of the same `audio_uid` are appended to a rolling  
+    buffer; the uncommitted part of the open segment is decoded again every few hundred  
+    milliseconds and a "partial" event carries the committed (stable) and unstable text. Once a segment  
+    ends in a pause it is sent as a "final" event with its translation and its audio  
+    is dropped. `is_final` in the header flushes the stream of that `audio_uid`.  
+  
+    :param websocket: WebSocket  
+        The WebSocket connection to the client.  
+    """  
+    await websocket.accept()  
+    sessions = {}  
+    pending = asyncio.Event()  
+  
+    async def send_failed(session, message):  
+        """Tell the client a decode of the stream failed."""  
+        request = session.request  
+        response_data = StreamingResponseSTT(  
+            meeting_id=request.meeting_id,  
+            device_id=request.device_id,  
+            audio_uid=request.audio_uid,  
+            event="final" if session.closing else "partial",  
+            segment_id=session.segment_id,  
+            ori_lang=request.o_lang.lower(),  
+            ori_text="",  
+            committed_text="",  
+            unstable_text="",  
+            trans_lang=request.t_lang.lower(),  
+            trans_text="",  
+            transcribe_time=0.0,  
+            translate_time=0.0,  
+        )  
+        await websocket.send_json(BaseResponse(status="FAILED", message=message, data=response_data).model_dump())  
+  
+    async def decode_session(session):  
+        """Decode the open segment of one stream and send the resulting event."""  
+        request = session.request  
+        o_lang, t_lang = request.o_lang.lower(), request.t_lang.lower()  
+        audio = session.window()  
+        # Only the audio after the committed part is decoded, with the committed text as the prompt  
+        options = model.decode_options(o_lang).model_copy(update={"initial_prompt": session.prefix or None})  
+        # Same admission control as the other endpoints, streaming decodes count as in flight  
+        model.admission.check(model.model_version, len(jobs), jobs.queued_seconds)  
+        try:  
+            with model.admission.track(len(audio) / SAMPLE_RATE):  
+                ori_pred, inference_time = await model.run_in_executor(functools.partial(model.transcribe, count_vad=False), audio, o_lang, Deadline(WAITING_TIME), options)  
+        except InferenceTimeout as e:  
+            TIMEOUTS.inc(stage=e.stage)  
+            logger.info(f" | audio_uid: {request.audio_uid} | streaming decode exceeded the upper limit time | ")  
+            return  
+        event = session.update(ori_pred, audio)  
+        if event["event"] == "final" and not event["text"] and not session.closing:  
+            return  
+  
+        response_data = StreamingResponseSTT(  
+            meeting_id=request.meeting_id,  
+            device_id=request.device_id,  
+            audio_uid=request.audio_uid,  
+            event=event["event"],  
+            segment_id=event["segment_id"],  
+            ori_lang=o_lang,  
+            ori_text=event["text"],  
+            committed_text=event["committed_text"],  
+            unstable_text=event["unstable_text"],  
+            trans_lang=t_lang,  
+            trans_text="",  
+            transcribe_time=inference_time,  
+            translate_time=0.0,  
+        )  
+        if event["event"] == "final" and event["text"]:  
+            # Only finished segments are translated  
+            with model.admission.track(0.0):  
+                translated_pred, translate_time, translate_method = await model.run_in_executor(model.translate, event["text"], o_lang, t_lang, Deadline(WAITING_TIME))  
+            response_data.trans_text = translated_pred  
+            response_data.translate_time = translate_time  
+            logger.info(f" | device_id: {request.device_id} | audio_uid: {request.audio_uid} | segment: {event['segment_id']} | translate_method: {translate_method} | ")  
+            logger.info(f" | transcription: {response_data.ori_text} | translation: {response_data.trans_text} | ")  
+        await websocket.send_json(BaseResponse(status="OK", message=f" | {event['event']}: {response_data.ori_text} | ", data=response_data).model_dump())  
+  
+    async def process_streams():  
+        """Decode every stream with enough new audio whenever frames arrive."""  
+        while True:  
+            await pending.wait()  
+            pending.clear()  
+            for audio_uid, session in list(sessions.items()):  
+                if not session.ready():  
+                    continue  
+                try:  
+                    await decode_session(session)  
+                except Exception as e:  
+                    if isinstance(e, Overloaded):  
+                        message = f" | Server is busy: {e.reason}, retry after {e.retry_after} seconds | "  
+                    elif isinstance(e, InferenceTimeout):  
+                        # The translation of a final segment ran out of time  
+                        TIMEOUTS.inc(stage=e.stage)  
+                        message = f" | streaming inference() exceeded the upper limit time at {e.stage} | "  
+                    else:  
+                        logger.error(f" | streaming inference() audio_uid: {audio_uid} error: {e} | ")  
+                        message = f" | streaming inference() error: {e} | "  
+                    try:  
+                        await send_failed(session, message)  
+                    except Exception:  
+                        pass  
+                    if session.closing:  
+                        # The stream is over and its last window cannot be decoded, drop it instead of retrying  
+                        sessions.pop(audio_uid, None)  
+                        continue  
+                if session.closing and not session.ready():  
+                    sessions.pop(audio_uid, None)  
+                elif session.ready():  
+                    pending.set()  
+  
+    # Create a background task to decode the streams  
+    task = asyncio.create_task(process_streams())  
   
-            if not audio_uid_exist:  
-                waiting_list.append(response_data)  
+    try:  
+        while True:  
+            # Receive the frame header and the PCM frame from the client  
+            data = await websocket.receive_json()  
+            stream_request = StreamingData(**data)  
+            audio_bytes = await websocket.receive_bytes()  
   
-            if previous_waiting_list != waiting_list:  
-                file_name = f"{response_data.times}.wav"  
-                audio_buffer = f"audio/{file_name}"  
-                with open(audio_buffer, 'wb') as f:  
-                    f.write(audio_bytes)  
+            session = sessions.get(stream_request.audio_uid)  
+            if session is None:  
+                session = sessions[stream_request.audio_uid] = StreamingSession(stream_request, model.vad)  
+            session.append(pcm16_to_float32(audio_bytes))  
+            if stream_request.is_final:  
+                session.close()  
+            if session.ready():  
+                pending.set()  
     except WebSocketDisconnect:  
-        logger.info(" | Client disconnected | ")  
+        logger.info(" | Streaming client disconnected | ")  
+    finally:  
+        task.cancel()  
         
 @app.post("/sse_rtt_translate", description="**[DEPRECATED]** This endpoint is deprecated and will be removed in the future. Please use `/sse_rtt_translate/v2` instead.")  
 async def sse_rtt_translate(  
@@ -570,34 +825,23 @@ async def sse_rtt_translate(
         translate_time=0.0,  
     )  
       
+    # Reject with 429 when the inference path is saturated  
+    admit()  
+      
+    # Decode the uploaded audio off the event loop before it joins the waiting list  
     try:  
-        previous_waiting_list = waiting_list.copy()  
-        audio_uid_exist = False  
-          
-        # Check if the audio UID already exists in the waiting list  
-        for item in previous_waiting_list:  
-            if item.audio_uid == response_data.audio_uid:  
-                audio_uid_exist = True  
-                if item.times < response_data.times:  
-                    waiting_list.remove(item)  
-                    waiting_list.append(response_data)  
-                    audio = f"audio/{item.times}.wav"  
-                    if os.path.exists(audio):  
-                        os.remove(audio)  
-                break  
-          
-        if not audio_uid_exist:  
-            waiting_list.append(response_data)  
-          
-        if previous_waiting_list != waiting_list:  
-            file_name = f"{response_data.times}.wav"  
-            audio_buffer = f"audio/{file_name}"  
-            with open(audio_buffer, 'wb') as f:  
-                f.write(file.file.read())  
+        audio = await asyncio.to_thread(decode_audio_bytes, await file.read())  
+    except Exception as e:  
+        logger.error(f" | decode audio error: {e} | ")  
+        raise HTTPException(status_code=400, detail=f"The audio file could not be decoded: {e}")  
+      
+    try:  
+        # A newer clip of the same audio UID replaces the waiting one, queuing wakes a job worker  
+        jobs.put(response_data, audio, functools.partial(sse_results.publish, meeting_id=response_data.meeting_id))  
           
-        # Check if the audio file exists  
-        if not os.path.exists(audio_buffer):  
-            return BaseResponse(status="FAILED", message=" | The audio file does not exist, please check the audio path. | ", data=response_data)  
+        # Check if the audio is empty  
+        if audio.size == 0:  
+            return BaseResponse(status="FAILED", message=" | The audio file is empty, please check the audio. | ", data=response_data)  
           
         # Check if the model has been loaded  
         if model.model_version is None:  
@@ -665,34 +909,23 @@ async def sse_rtt_translate(
         translate_time=0.0,  
     )  
       
+    # Reject with 429 when the inference path is saturated  
+    admit()  
+      
+    # Decode the uploaded audio off the event loop before it joins the waiting list  
     try:  
-        previous_waiting_list = waiting_list.copy()  
-        audio_uid_exist = False  
-          
-        # Check if the audio UID already exists in the waiting list  
-        for item in previous_waiting_list:  
-            if item.audio_uid == response_data.audio_uid:  
-                audio_uid_exist = True  
-                if item.times < response_data.times:  
-                    waiting_list.remove(item)  
-                    waiting_list.append(response_data)  
-                    audio = f"audio/{item.times}.wav"  
-                    if os.path.exists(audio):  
-                        os.remove(audio)  
-                break  
-          
-        if not audio_uid_exist:  
-            waiting_list.append(response_data)  
-          
-        if previous_waiting_list != waiting_list:  
-            file_name = f"{response_data.times}.wav"  
-            audio_buffer = f"audio/{file_name}"  
-            with open(audio_buffer, 'wb') as f:  
-                f.write(file.file.read())  
+        audio = await asyncio.to_thread(decode_audio_bytes, await file.read())  
+    except Exception as e:  
+        logger.error(f" | decode audio error: {e} | ")  
+        raise HTTPException(status_code=400, detail=f"The audio file could not be decoded: {e}")  
+      
+    try:  
+        # A newer clip of the same audio UID replaces the waiting one, queuing wakes a job worker  
+        jobs.put(response_data, audio, functools.partial(sse_results.publish, meeting_id=response_data.meeting_id))  
           
-        # Check if the audio file exists  
-        if not os.path.exists(audio_buffer):  
-            return BaseResponse(status="FAILED", message=" | The audio file does not exist, please check the audio path. | ", data=response_data)  
+        # Check if the audio is empty  
+        if audio.size == 0:  
+            return BaseResponse(status="FAILED", message=" | The audio file is empty, please check the audio. | ", data=response_data)  
           
         # Check if the model has been loaded  
         if model.model_version is None:  
@@ -710,76 +943,34 @@ async def sse_rtt_translate(
     
   
 @app.get("/sse_rtt_translate")  
-async def sse_rtt_translate():  
+async def sse_rtt_translate(meeting_id: str = None):  
     """  
     Server-Sent Events endpoint to handle real-time translation.  
   
-    This endpoint checks the waiting list and processes the translation if the model is not busy.  
+    This endpoint streams the result of every clip uploaded to `/sse_rtt_translate/v2`  
+    as soon as it is ready.  
+  
+    :param meeting_id: str  
+        Only stream the results of this meeting (every meeting if omitted).  
     """  
-    sse_stop_event.clear()  
-
-    async def event_stream():  
-        while not sse_stop_event.is_set():  
-            if waiting_list and not model.processing:  
-                response_data = waiting_list.pop(0)  
-                audio_buffer = f"audio/{response_data.times}.wav"  
-                o_lang = response_data.ori_lang  
-                t_lang = response_data.trans_lang  
+    results = sse_results.subscribe(meeting_id)  
   
-                try:  
-                    # Create an event to signal stopping  
-                    stop_event = threading.Event()  
-                    # Create timing thread and inference thread  
-                    time_thread = threading.Thread(target=waiting_times, args=(stop_event, model, WAITING_TIME))  
-                    inference_thread = threading.Thread(target=ws_translate_and_print, args=(model, audio_buffer, o_lang, t_lang, stop_event))  
-  
-                    # Start the threads  
-                    time_thread.start()  
-                    inference_thread.start()  
-  
-                    # Wait for timing thread to complete and stop the inference thread if still running  
-                    time_thread.join()  
-                    stop_thread(inference_thread)  
-  
-                    # Remove the audio buffer file  
-                    os.remove(audio_buffer)  
-  
-                    # Process results from the result queue  
-                    while not model.result_queue.empty():  
-                        o_result, t_result, inference_time, g_translate_time, translate_method = model.result_queue.get()  
-                        response_data.ori_text = o_result  
-                        response_data.trans_text = t_result  
-                        response_data.transcribe_time = inference_time  
-                        response_data.translate_time = g_translate_time  
-  
-                        logger.debug(response_data.model_dump_json())  
-                        logger.info(f" | device_id: {response_data.device_id} | audio_uid: {response_data.audio_uid} | language: {response_data.ori_lang} -> {response_data.trans_lang} | translate_method: {translate_method} | ")  
-                        logger.info(f" | transcription: {response_data.ori_text} | ")  
-                        logger.info(f" | translation: {response_data.trans_text} | ")  
-                        logger.info(f" | Inference completed in {inference_time:.2f} seconds. Translation completed in {g_translate_time:.2f} seconds. | ")  
-  
-                        base_response = BaseResponse(  
-                            status="OK",  
-                            message=f" | transcription: {response_data.ori_text} | translation: {response_data.trans_text} | ",  
-                            data=response_data  
-                        )  
-                        yield f"{base_response}\n\n"  
-                except Exception as e:  
-                    logger.error(f' | inference() error: {e} | ')  
-                    base_response = BaseResponse(  
-                        status="FAILED",  
-                        message=f" | inference() error: {e} | ",  
-                        data=response_data  
-                    )  
-                    yield f"{base_response}\n\n"  
-            await asyncio.sleep(0.1)  
+    async def event_stream():  
+        try:  
+            while True:  
+                base_response = await results.get()  
+                if base_response is None:  
+                    break  
+                yield f"{base_response}\n\n"  
+        finally:  
+            sse_results.unsubscribe(results, meeting_id)  
   
     return StreamingResponse(event_stream(), media_type="text/event-stream") 
 
 @app.post("/stop_sse")  
-async def stop_sse():  
-    """Endpoint to stop the SSE connection."""  
-    sse_stop_event.set() 
+async def stop_sse(meeting_id: str = None):  
+    """Endpoint to stop the SSE connections (of one meeting, or all of them)."""  
+    sse_results.close(meeting_id) 
     return BaseResponse(status="OK", message=" | SSE connection has been stopped | ", data=None)  
 
 @app.post("/vst_translate", description="**[DEPRECATED]** This endpoint is deprecated and will be removed in the future. Please use `/sse_rtt_translate/v2` instead.")  
@@ -817,14 +1008,16 @@ async def vst_translate(
         tar_text="",  
     )  
       
-    file_name = times + ".wav"  
-    audio_buffer = f"audio/{file_name}"  
-    with open(audio_buffer, 'wb') as f:  
-        f.write(file.file.read())  
+    # Decode the uploaded audio in memory, off the event loop (non-WAV input spawns ffmpeg)  
+    try:  
+        audio_buffer = await asyncio.to_thread(decode_audio_bytes, await file.read(), transcription_request.sample_rate)  
+    except Exception as e:  
+        logger.error(f" | decode audio error: {e} | ")  
+        raise HTTPException(status_code=400, detail=f"The audio file could not be decoded: {e}")  
       
-    # Check if the audio file exists  
-    if not os.path.exists(audio_buffer):  
-        return BaseResponse(status="FAILED", message=" | The audio file does not exist, please check the audio path. | ", data=response_data)  
+    # Check if the audio is empty  
+    if audio_buffer.size == 0:  
+        return BaseResponse(status="FAILED", message=" | The audio file is empty, please check the audio. | ", data=response_data)  
       
     # Check if the model has been loaded  
     if model.model_version is None:  
@@ -835,33 +1028,27 @@ async def vst_translate(
         logger.info(f" | One or both languages are not in LANGUAGE_LIST: {LANGUAGE_LIST}. | ")  
         return BaseResponse(status="FAILED", message=f" | One or both languages are not in LANGUAGE_LIST: {LANGUAGE_LIST}. | ", data=response_data)  
       
+    # Reject with 429 when the inference path is saturated  
+    admit()  
+      
     try:  
-        # Create a queue to hold the return value  
-        result_queue = Queue()  
-        # Create an event to signal stopping  
-        stop_event = threading.Event()  
-          
         timeout = transcription_request.timeout  
-        # Create timing thread and inference thread  
-        time_thread = threading.Thread(target=waiting_times, args=(stop_event, timeout))  
-        inference_thread = threading.Thread(target=translate_and_print, args=(model, audio_buffer, o_lang, t_lang, result_queue, stop_event))  
-          
-        # Start the threads  
-        time_thread.start()  
-        inference_thread.start()  
-          
-        # Wait for timing thread to complete and check if the inference thread is active to close  
-        time_thread.join()  
-        stop_thread(inference_thread)  
-          
-        # Remove the audio buffer file  
-        os.remove(audio_buffer)  
-          
-        # Get the result from the queue  
-        if not result_queue.empty():  
-            o_result, t_result, inference_time, g_translate_time, translate_method = result_queue.get()  
+        stats = {}  
+        # Run the job on the inference worker pool without blocking the event loop  
+        try:  
+            # Offline requests keep whisper's full temperature schedule within their timeout  
+            result = await run_inference(audio_buffer, o_lang, t_lang, timeout, profile="offline", stats=stats)  
+        except (asyncio.TimeoutError, InferenceTimeout) as e:  
+            result = None  
+            # Keep whatever was transcribed before the deadline  
+            response_data.ori_text = getattr(e, "partial", "")  
+  
+        # Get the result from the inference job  
+        if result is not None:  
+            o_result, t_result, inference_time, g_translate_time, translate_method = result  
             response_data.ori_text = o_result  
             response_data.tar_text = t_result  
+            response_data.fallbacks = stats.get("fallbacks", 0)  
               
             logger.debug(response_data.model_dump_json())  
             logger.info(f" | language: {o_lang} -> {t_lang} | translate_method: {translate_method} | timeout time: {timeout} | ")  
@@ -917,14 +1104,16 @@ async def vst_translate(
         tar_text="",  
     )  
       
-    file_name = times + ".wav"  
-    audio_buffer = f"audio/{file_name}"  
-    with open(audio_buffer, 'wb') as f:  
-        f.write(file.file.read())  
+    # Decode the uploaded audio in memory, off the event loop (non-WAV input spawns ffmpeg)  
+    try:  
+        audio_buffer = await asyncio.to_thread(decode_audio_bytes, await file.read(), sample_rate)  
+    except Exception as e:  
+        logger.error(f" | decode audio error: {e} | ")  
+        raise HTTPException(status_code=400, detail=f"The audio file could not be decoded: {e}")  
       
-    # Check if the audio file exists  
-    if not os.path.exists(audio_buffer):  
-        return BaseResponse(status="FAILED", message=" | The audio file does not exist, please check the audio path. | ", data=response_data)  
+    # Check if the audio is empty  
+    if audio_buffer.size == 0:  
+        return BaseResponse(status="FAILED", message=" | The audio file is empty, please check the audio. | ", data=response_data)  
       
     # Check if the model has been loaded  
     if model.model_version is None:  
@@ -935,32 +1124,26 @@ async def vst_translate(
         logger.info(f" | One or both languages are not in LANGUAGE_LIST: {LANGUAGE_LIST}. | ")  
         return BaseResponse(status="FAILED", message=f" | One or both languages are not in LANGUAGE_LIST: {LANGUAGE_LIST}. | ", data=response_data)  
       
+    # Reject with 429 when the inference path is saturated  
+    admit()  
+  
+    stats = {}  
     try:  
-        # Create a queue to hold the return value  
-        result_queue = Queue()  
-        # Create an event to signal stopping  
-        stop_event = threading.Event()  
-          
-        # Create timing thread and inference thread  
-        time_thread = threading.Thread(target=waiting_times, args=(stop_event, timeout))  
-        inference_thread = threading.Thread(target=translate_and_print, args=(model, audio_buffer, o_lang, t_lang, result_queue, stop_event))  
-          
-        # Start the threads  
-        time_thread.start()  
-        inference_thread.start()  
-          
-        # Wait for timing thread to complete and check if the inference thread is active to close  
-        time_thread.join()  
-        stop_thread(inference_thread)  
-          
-        # Remove the audio buffer file  
-        os.remove(audio_buffer)  
-          
-        # Get the result from the queue  
-        if not result_queue.empty():  
-            o_result, t_result, inference_time, g_translate_time, translate_method = result_queue.get()  
+        # Run the job on the inference worker pool without blocking the event loop  
+        try:  
+            # Offline requests keep whisper's full temperature schedule within their timeout  
+            result = await run_inference(audio_buffer, o_lang, t_lang, timeout, profile="offline", stats=stats)  
+        except (asyncio.TimeoutError, InferenceTimeout) as e:  
+            result = None  
+            # Keep whatever was transcribed before the deadline  
+            response_data.ori_text = getattr(e, "partial", "")  
+  
+        # Get the result from the inference job  
+        if result is not None:  
+            o_result, t_result, inference_time, g_translate_time, translate_method = result  
             response_data.ori_text = o_result  
             response_data.tar_text = t_result  
+            response_data.fallbacks = stats.get("fallbacks", 0)  
               
             logger.debug(response_data.model_dump_json())  
             logger.info(f" | language: {o_lang} -> {t_lang} | translate_method: {translate_method} | timeout time: {timeout} | ")  
@@ -1003,7 +1186,7 @@ async def text_translate(
   
     try:  
         # Perform translation  
-        translated_pred, g_translate_time, translate_method = model.translate(o_result, o_lang, t_lang)  
+        translated_pred, g_translate_time, translate_method = await model.translate_async(o_result, o_lang, t_lang)  
         response_data.ori_text = o_result  
         response_data.tar_text = translated_pred  
           
@@ -1020,6 +1203,61 @@ async def text_translate(
         state = "FAILED"  
         return BaseResponse(status=state, message=f" | inference() error: {e} | ", data=response_data)  
 
+@app.post("/text_translate/multi")  
+async def text_translate_multi(translate_request: TextMultiData):  
+    """  
+    Translate a text into several target languages at once.  
+  
+    The targets are translated concurrently over pooled connections, so e.g.  
+    zh -> en, ja and ko cost about one backend round trip.  
+  
+    :param translate_request: TextMultiData  
+        The text, its language and the target languages.  
+    :rtype: BaseResponse  
+        A response containing {target language: translation}.  
+    """  
+    o_lang = translate_request.o_lang.lower()  
+    t_langs = [t_lang.lower() for t_lang in translate_request.t_langs]  
+    o_result = translate_request.ori_text  
+  
+    if o_lang not in LANGUAGE_LIST or not set(t_langs).issubset(LANGUAGE_LIST):  
+        return BaseResponse(status="FAILED", message=f" | One or more languages are not in LANGUAGE_LIST: {LANGUAGE_LIST}. | ", data=None)  
+  
+    try:  
+        translations, translate_time, translate_method = await model.translate_multi(o_result, o_lang, t_langs)  
+    except Exception as e:  
+        logger.error(f' | translate_multi() error: {e} | ')  
+        return BaseResponse(status="FAILED", message=f" | translate_multi() error: {e} | ", data=None)  
+  
+    logger.info(f" | language: {o_lang} -> {t_langs} | translate_method: {translate_method} | translate has been completed in {translate_time:.2f} seconds. |")  
+    logger.info(f" | transcription: {o_result} |")  
+    logger.info(f" | translation: {translations} |")  
+    return BaseResponse(status="OK", message=f" | input text: {o_result} | translation: {translations} | ", data=translations)  
+  
+@app.post("/text_translate/batch")  
+async def text_translate_batch(translate_request: TextBatchData):  
+    """  
+    Translate many texts at once (e.g. a whole meeting transcript).  
+  
+    Segments may mix language pairs. They are grouped by language pair and sent to  
+    the translation backend in as few calls as possible.  
+  
+    :param translate_request: TextBatchData  
+        The segments to be translated.  
+    :rtype: BaseResponse  
+        A response containing one translation per segment, in input order.  
+    """  
+    segments = [(segment.ori_text, segment.o_lang.lower(), segment.t_lang.lower()) for segment in translate_request.segments]  
+    try:  
+        translations, translate_time, translate_method = await model.run_in_executor(model.translate_batch, segments)  
+    except Exception as e:  
+        logger.error(f' | translate_batch() error: {e} | ')  
+        return BaseResponse(status="FAILED", message=f" | translate_batch() error: {e} | ", data=None)  
+  
+    response_data = [VSTResponseSTT(ori_text=text, tar_text=translated) for (text, _, _), translated in zip(segments, translations)]  
+    logger.info(f" | {len(segments)} segments | translate_method: {translate_method} | translate has been completed in {translate_time:.2f} seconds. |")  
+    return BaseResponse(status="OK", message=f" | {len(segments)} segments have been translated in {translate_time:.2f} seconds. | ", data=response_data)  
+  
 # Clean up audio files  
 def delete_old_audio_files():  
     """  
@@ -1050,6 +1288,8 @@ def delete_old_audio_files():
 # Daily task scheduling  
 def schedule_daily_task(stop_event):  
     while not stop_event.is_set():  
+        # Persist the translation cache now and then, not only on a clean shutdown  
+        model.translate_cache.maybe_save()  
         if local_now.hour == 0 and local_now.minute == 0:  
             delete_old_audio_files()  
             time.sleep(60)  # Prevent triggering multiple times within the same minute  
@@ -1061,10 +1301,13 @@ task_thread = Thread(target=schedule_daily_task, args=(service_stop_event,))
 task_thread.start()  
   
 @app.on_event("shutdown")  
-def shutdown_event():  
+async def shutdown_event():  
     service_stop_event.set()  
     task_thread.join()  
+    model.shutdown()  
+    model.translate_cache.save()  
     model.ollama_translator.close()
+    await model.close_async_translators()  
     logger.info(" | Scheduled task has been stopped. | ")  
   
 if __name__ == "__main__":  
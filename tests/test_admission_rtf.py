@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+import threading
+import numpy as np
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+os.chdir(ROOT)
+os.makedirs("logs", exist_ok=True)
+
+# api.model imports every translation backend
+for backend in ("googletrans", "ollama", "openai"):
+    pytest.importorskip(backend)
+
+import whisper
+from whisper.model import ModelDimensions
+from whisper.decoding import DecodingResult
+import api.model
+from api.model import Model
+from api.batching import BatchScheduler
+from lib.constant import SAMPLE_RATE
+
+# Seconds one fake whisper.decode takes, whatever the batch size
+DECODE_SECONDS = 0.4
+
+
+def fake_decode(model, mel, options):
+    time.sleep(DECODE_SECONDS)
+    return [DecodingResult(audio_features=None, language="en", text="hello", avg_logprob=-0.1,
+                           no_speech_prob=0.0, compression_ratio=1.0) for _ in range(mel.shape[0])]
+
+
+def tiny_whisper():
+    """A randomly initialised Whisper small enough to build in a test, only its type and dims are used."""
+    dims = ModelDimensions(n_mels=80, n_audio_ctx=1500, n_audio_state=64, n_audio_head=1, n_audio_layer=1,
+                           n_vocab=51865, n_text_ctx=448, n_text_state=64, n_text_head=1, n_text_layer=1)
+    return whisper.model.Whisper(dims)
+
+
+def test_batched_rtf_is_not_multiplied_by_concurrency(monkeypatch):
+    monkeypatch.setattr(api.model, "IS_VAD", False)
+    monkeypatch.setattr(api.model, "IS_BATCH", True)
+    monkeypatch.setattr(api.model.whisper, "decode", fake_decode)
+
+    model = Model(stub_translators=True)
+    model.model, model.model_version = tiny_whisper(), "tiny"
+    # A long window so both clips land in the same batch
+    model.whisper_batcher.close()
+    model.whisper_batcher = BatchScheduler(model._transcribe_whisper_batch, 300, 8, name="test-batch")
+
+    clip = np.random.default_rng(0).standard_normal(SAMPLE_RATE).astype(np.float32) * 0.1
+    options = model.decode_options("en").model_copy(update={"temperature": (0.0,)})
+    texts = []
+    threads = [threading.Thread(target=lambda: texts.append(model.transcribe(clip, "en", options=options)[0])) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    model.shutdown()
+
+    assert texts == ["hello", "hello"]
+    # One batch decoded 2 s of audio in about DECODE_SECONDS; end-to-end time per clip would be
+    # DECODE_SECONDS plus the batch window over 1 s, more than twice as much
+    rtf = model.admission.rtf("tiny")
+    assert rtf < 1.5 * DECODE_SECONDS / 2
+    assert rtf >= DECODE_SECONDS / 2